@@ -24,9 +24,11 @@
 """Pipeline to merge preprocessed eye tracking files."""
 
 import os
-import pandas as pd
+import tempfile
+import pyarrow as pa
 from aggregation.load_config import load_config
 from aggregation.load_data import load_data
+from aggregation.merge_probands import get_batch_rows, merge_sorted_runs, write_sorted_run
 
 
 class AggregationPipeline:
@@ -35,28 +37,39 @@ class AggregationPipeline:
     def __init__(self, config_file: str) -> None:
         self.config = load_config(config_file)
 
-    def run(self) -> pd.DataFrame:
-        """Load all preprocessed files and combine them into a single parquet."""
-        data_all = []
-        for proband_id in self.config.probands_selected:
-            df = load_data(self.config.data_directory_processed, str(proband_id))
-            df["groundtruth+id++"] = str(proband_id)
-            rename_cols = {
-                "groundtruth+phase+": "groundtruth+phase++",
-                "groundtruth+scenario+": "groundtruth+scenario++",
-                "groundtruth+variant+": "groundtruth+variant++",
-                "groundtruth+BAC+": "groundtruth+BAC++",
-            }
-            df.rename(columns={k: v for k, v in rename_cols.items() if k in df.columns}, inplace=True)
-            data_all.append(df)
-
-        if not data_all:
-            raise RuntimeError("No data found for selected participants")
-
-        data_agg = pd.concat(data_all).sort_index()
+    def run(self) -> str:
+        """Combine all preprocessed files into a single parquet ordered by time and return its path.
+
+        The probands are loaded one at a time and spilled to sorted temporary parquet files, which are then merged
+        in batches that fit into the configured memory budget.
+        """
         output_dir = os.path.join(self.config.data_directory_processed, "ircam")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, "all_probands.parquet")
-        data_agg.to_parquet(output_file)
-        print("Saved aggregated data to", output_file)
-        return data_agg
+
+        with tempfile.TemporaryDirectory(dir=output_dir, prefix="spill_") as spill_dir:
+            filenames = []
+            schemas = []
+            for proband_id in self.config.probands_selected:
+                df = load_data(self.config.data_directory_processed, str(proband_id))
+                df["groundtruth+id++"] = str(proband_id)
+                rename_cols = {
+                    "groundtruth+phase+": "groundtruth+phase++",
+                    "groundtruth+scenario+": "groundtruth+scenario++",
+                    "groundtruth+variant+": "groundtruth+variant++",
+                    "groundtruth+BAC+": "groundtruth+BAC++",
+                }
+                df.rename(columns={k: v for k, v in rename_cols.items() if k in df.columns}, inplace=True)
+                filenames.append(os.path.join(spill_dir, f"{proband_id}.parquet"))
+                schemas.append(write_sorted_run(df, filenames[-1]))
+                del df
+
+            if not filenames:
+                raise RuntimeError("No data found for selected participants")
+
+            schema = pa.unify_schemas(schemas, promote_options="permissive")
+            batch_rows = get_batch_rows(filenames, self.config.max_memory_gb * 2 ** 30)
+            num_rows = merge_sorted_runs(filenames, output_file, schema, batch_rows)
+
+        print(f"Saved aggregated data ({num_rows} rows) to", output_file)
+        return output_file
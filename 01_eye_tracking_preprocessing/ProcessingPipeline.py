@@ -22,21 +22,25 @@
 #####################################################################
 
 import os
+import time
+import traceback
 import pandas as pd
-from joblib import Parallel, delayed
+from datetime import datetime
 from processing.add_blood_biometrics import add_bac_level
 from processing.add_eye_movement import add_eye_movement
 from processing.add_phase_scenario_columns import add_phase_scenario_columns
-from processing.calculate_acceleration import calculate_acceleration
+from processing.calculate_kinematics import calculate_kinematics
 from processing.calculate_spherical_coordinates import calculate_spherical_coordinates
-from processing.calculate_velocity import calculate_velocity
+from processing.checkpoints import StageCheckpoints, get_input_key, run_stages
 from processing.check_phases_scenarios import check_phases_scenarios
 from processing.crop_data import crop_data
 from processing.interpolate_and_filter import interpolate_and_filter
 from processing.load_config import load_config
-from processing.load_raw_file import load_file
+from processing.load_raw_file import load_file, used_columns
 from processing.preprocess import preprocess
+from processing.proband_scheduler import MAX_WORKERS, get_raw_size, run_scheduled, write_run_summary
 from processing.produce_phases_csv import produce_phases_csv
+from processing.raw_file_cache import load_file_cached
 from processing.rad_to_deg import rad_to_deg
 from processing.remodnav.remodnav.remodnav import remodnav
 from processing.renaming_conventions import renaming_convention_dict
@@ -60,14 +64,33 @@ class ProcessingPipeline:
 
         print(f"Processing {len(folders)} probands")
 
-        if self.config.run_probands_in_parallel:
-            with Parallel(
-                n_jobs=min(32, len(folders)), verbose=51, backend="multiprocessing"
-            ) as parallel:
-                parallel(delayed(self.run_proband_safely)(folder) for folder in folders)
-        else:
-            for folder in folders:
-                self.run_proband(folder)
+        raw_sizes = {
+            folder: get_raw_size(os.path.join(self.config.raw_input_directory, folder)) for folder in folders
+        }
+        started = datetime.now()
+        results = []
+        try:
+            if self.config.run_probands_in_parallel:
+                max_memory = self.config.max_memory_gb * 2 ** 30 if self.config.max_memory_gb is not None else None
+                for result in run_scheduled(
+                    self.run_proband_safely,
+                    raw_sizes,
+                    max_workers=min(MAX_WORKERS, len(folders)),
+                    max_memory=max_memory,
+                    memory_per_raw_byte=self.config.memory_per_raw_byte,
+                ):
+                    results.append(result)
+                    print(f"Finished proband {result['folder']}: {result['status']} "
+                          f"({len(results)}/{len(folders)})")
+            else:
+                for folder in folders:
+                    results.append(self.run_proband_safely(folder))
+        finally:
+            for result in results:
+                result["raw_bytes"] = raw_sizes[result["folder"]]
+            write_run_summary(
+                os.path.join(self.config.preprocessed_output_directory, "run_summary.json"), started, results
+            )
 
     # Read in the data of one proband from all available .csv files.
     def load_data(self, directory_folder: str) -> pd.DataFrame:
@@ -76,6 +99,11 @@ class ProcessingPipeline:
         directory_ircam = os.path.join(
             directory_folder, path_suffix
         )
+        # Parsed recordings are cached next to the processed output of the proband.
+        directory_cache = os.path.join(
+            self.config.preprocessed_output_directory, os.path.basename(os.path.normpath(directory_folder)),
+            "ircam", "raw_cache"
+        )
         raw_data = []
         for file in os.listdir(directory_ircam):
             if (
@@ -83,7 +111,10 @@ class ProcessingPipeline:
                 and file.endswith(".csv")
                 and os.path.isfile(os.path.join(directory_ircam, file))
             ):
-                file_data = load_file(os.path.join(directory_ircam, file))
+                if self.config.cache_raw_files:
+                    file_data = load_file_cached(os.path.join(directory_ircam, file), directory_cache)
+                else:
+                    file_data = load_file(os.path.join(directory_ircam, file))
                 raw_data.append(file_data)
 
         # Concat the data from all .csv files to one data frame and sort according to date.
@@ -91,55 +122,114 @@ class ProcessingPipeline:
         raw_data.sort_index(inplace=True)
         return raw_data
 
-    def preprocess_data(
-        self, raw_data: pd.DataFrame, folder: str, directory_folder: str
-    ):
+    def preprocess_data(self, folder: str, directory_folder: str):
         # Read in the times of the data phases and check if all requested data phases are available.
         data_phases = produce_phases_csv(directory_folder)
 
-        raw_data = interpolate_and_filter(raw_data)
-
-        # Add the blood alcohol concentration data.
-        raw_data = add_bac_level(raw_data, directory_folder)
-
         selected_phases_checked, selected_scenarios_checked = check_phases_scenarios(data_phases, self.config.selected_phases,
                                                                                       self.config.selected_scenarios)
+        scenario_starts = list(data_phases[
+            data_phases["phase"].isin(selected_phases_checked)
+            & data_phases["scenario"].isin(selected_scenarios_checked)
+        ]["start"])
+
+        def load(state):
+            state["data"] = self.load_data(directory_folder)
+            return state
+
+        def interpolate(state):
+            state["data"] = interpolate_and_filter(state["data"])
+            return state
+
+        # Add the blood alcohol concentration data.
+        def add_bac(state):
+            state["data"] = add_bac_level(state["data"], directory_folder)
+            return state
 
         # Crop data such that only the data of the requested scenarios and phases are left.
-        raw_selected_data, selected_phase_times, selected_scenario_times = crop_data(
-            raw_data, data_phases, selected_phases_checked, selected_scenarios_checked
-        )
+        def crop(state):
+            state["data"], state["selected_phase_times"], state["selected_scenario_times"] = crop_data(
+                state["data"], data_phases, selected_phases_checked, selected_scenarios_checked
+            )
+            return state
 
         # Preprocess the data and calculate gaze features.
-        data = preprocess(
-            raw_selected_data,
-            directory_folder,
-            confidence=self.config.confidence,
-        )
+        def preprocess_and_transform(state):
+            state["data"] = preprocess(
+                state["data"],
+                directory_folder,
+                confidence=self.config.confidence,
+            )
+            return state
 
-        data = calculate_spherical_coordinates(data)
+        def spherical_coordinates(state):
+            state["data"] = calculate_spherical_coordinates(state["data"])
+            return state
 
         # Filter data and determine eye movement types with the REMODNAV algorithm.
-        remodnav_args = self.config.remodnav_args
-        data, data_events = remodnav(data, remodnav_args)
+        def eye_movement_events(state):
+            state["data"], state["data_events"] = remodnav(
+                state["data"], self.config.remodnav_args, segment_starts=scenario_starts
+            )
+            return state
 
         # Add eye movement types to data and one-hot encode them.
-        add_eye_movement(data, data_events)
-        data = data.join(pd.get_dummies(data["eye_movement_type"]))
+        def eye_movement(state):
+            data = state["data"]
+            add_eye_movement(data, state["data_events"])
+            state["data"] = data.join(pd.get_dummies(data["eye_movement_type"]))
+            return state
 
-        # Calculate velocity, acceleration.
-        data = calculate_velocity(data)
-        data = calculate_acceleration(data)
+        # Calculate velocity, acceleration within contiguous runs of the cropped scenarios.
+        def kinematics(state):
+            state["data"] = calculate_kinematics(
+                state["data"], segment_starts=scenario_starts, **self.config.kinematics_args
+            )
+            return state
 
         # Transform all data from radians to degree.
-        data = rad_to_deg(data)
+        def to_degree(state):
+            state["data"] = rad_to_deg(state["data"])
+            return state
 
         # Add the phase and the scenario of each data point to the data.
-        data = add_phase_scenario_columns(data, data_phases, selected_phases_checked)
+        def phase_scenario_columns(state):
+            state["data"] = add_phase_scenario_columns(state["data"], data_phases, selected_phases_checked)
+            return state
+
+        # Stages with the parameters their output depends on (besides the raw input files and previous stages).
+        stages = [
+            ("load_data", {"columns": used_columns}, load),
+            ("interpolate_and_filter", {}, interpolate),
+            ("add_bac_level", {}, add_bac),
+            ("crop_data", {"phases": selected_phases_checked, "scenarios": selected_scenarios_checked}, crop),
+            ("preprocess", {"confidence": self.config.confidence}, preprocess_and_transform),
+            ("calculate_spherical_coordinates", {}, spherical_coordinates),
+            ("remodnav", {"remodnav_args": self.config.remodnav_args}, eye_movement_events),
+            ("add_eye_movement", {}, eye_movement),
+            ("calculate_kinematics", {"kinematics_args": self.config.kinematics_args}, kinematics),
+            ("rad_to_deg", {}, to_degree),
+            ("add_phase_scenario_columns", {}, phase_scenario_columns),
+        ]
+
+        checkpoints = None
+        if self.config.checkpoint_stages:
+            checkpoints = StageCheckpoints(
+                os.path.join(self.config.preprocessed_output_directory, folder, "ircam", "checkpoints"),
+                self.config.checkpoint_stages,
+            )
+        input_key = get_input_key([
+            os.path.join(directory_folder, "study_day/ircam/"),
+            os.path.join(directory_folder, "study_day/handwritten-notes/"),
+        ])
+        timings = {}
+        state = run_stages(stages, input_key, checkpoints, timings)
 
+        data = state["data"]
         data.rename(columns=renaming_convention_dict, inplace=True)
 
         # Save data to a csv file.
+        start = time.perf_counter()
         save_files(
             data,
             self.config.preprocessed_output_directory,
@@ -147,21 +237,27 @@ class ProcessingPipeline:
             data_phases,
             selected_phases_checked,
             selected_scenarios_checked,
-            selected_phase_times,
-            selected_scenario_times,
+            state["selected_phase_times"],
+            state["selected_scenario_times"],
         )
+        timings["save_files"] = time.perf_counter() - start
+        return timings
 
-    # Process a single proband.
-    def run_proband(self, folder: str):
+    # Process a single proband and return the durations of its processing stages.
+    def run_proband(self, folder: str) -> dict:
         directory_folder = os.path.join(self.config.raw_input_directory, folder)
-        data = self.load_data(directory_folder)
-        self.preprocess_data(data, folder, directory_folder)
+        return self.preprocess_data(folder, directory_folder)
 
-    # Wrapper around run_proband to catch exceptions.
-    def run_proband_safely(self, folder: str):
+    # Wrapper around run_proband to catch exceptions, which are reported in the result instead.
+    def run_proband_safely(self, folder: str) -> dict:
+        result = {"folder": folder, "status": "success"}
+        start = time.perf_counter()
         try:
             print("Running proband: ", folder)
-            self.run_proband(folder)
+            result["stage_timings"] = self.run_proband(folder)
         except Exception as e:
             print(folder)
             print(f"Exception occurred: {e}")
+            result.update(status="failed", error=repr(e), traceback=traceback.format_exc())
+        result["duration"] = time.perf_counter() - start
+        return result
@@ -22,12 +22,14 @@
 #####################################################################
 
 import multiprocessing
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from joblib import Parallel, delayed
 
 from aggregation.fct_stats import (
     get_stats,
+    get_windows_stats,
     get_binary_event_stats,
     get_target_zone_stats,
     get_eventspec_stats,
@@ -41,12 +43,24 @@ def get_input_times(input_data, step_size, epoch_width) -> pd.DatetimeIndex:
         freq=f"{step_size}s",
     )
 
-    # Only use timestamps where data is available.
-    filtered = date_range.to_series().apply(
-        lambda i: ((input_data.index > i) & (input_data.index < i + epoch_width)).any()
-    )
+    # Only use timestamps where data is available, i.e. where the first sample after a start lies
+    # before the end of its window.
+    index = input_data.index
+    if not index.is_monotonic_increasing:
+        index = index.sort_values()
+    following = index.searchsorted(date_range, side="right")
+    available = following < len(index)
+    available[available] = index[following[available]] < date_range[available] + epoch_width
+
+    return pd.DatetimeIndex(date_range[available], freq=None)
+
+# Position of the first sample at or after each window start and of the first sample at or after each window end in
+# the sorted index, i.e. the rows of window k are index[window_starts[k]:window_ends[k]].
+def get_window_bounds(index: pd.DatetimeIndex, input_times: pd.DatetimeIndex, epoch_width: float):
+    window_starts = index.searchsorted(input_times, side="left")
+    window_ends = index.searchsorted(input_times + timedelta(seconds=epoch_width), side="left")
+    return window_starts, window_ends
 
-    return pd.DatetimeIndex(date_range.to_series()[filtered])
 
 # Function to get aggregated features in parallel implementation.
 def get_features(
@@ -59,6 +73,7 @@ def get_features(
     single_eye_movement_features: list[str]=None,
     all_eye_movement_features: str = "event+eye_movement_type+eventspec",
     target_zone_names: list[str]=None,
+    batches_per_core: int = 4,
 ) -> pd.DataFrame:
 
     if numerical_features is None:
@@ -74,55 +89,93 @@ def get_features(
         num_cores = min(32, multiprocessing.cpu_count())
     print("Using # cores: ", num_cores)
 
-    input_data = data.copy()
+    input_data = data
+    if not input_data.index.is_monotonic_increasing:
+        input_data = input_data.sort_index(kind="stable")
     inputs = get_input_times(input_data, step_size, epoch_width)
+    window_starts, window_ends = get_window_bounds(input_data.index, inputs, epoch_width)
+
+    # Consecutive windows are processed in batches, every batch only gets the rows its windows cover.
+    batches = np.array_split(np.arange(len(inputs)), max(1, min(len(inputs), num_cores * batches_per_core)))
+    batches = [batch for batch in batches if len(batch)]
 
     results = Parallel(n_jobs=num_cores, verbose=1)(
-        delayed(get_sliding_window)(
-            input_data,
+        delayed(get_sliding_windows)(
+            input_data.iloc[window_starts[batch[0]]:window_ends[batch].max()],
             epoch_width=epoch_width,
-            i=k,
+            input_times=inputs[batch],
+            window_starts=window_starts[batch] - window_starts[batch[0]],
+            window_ends=window_ends[batch] - window_starts[batch[0]],
             numerical_features=numerical_features,
             binary_features=binary_features,
             single_eye_movement_features=single_eye_movement_features,
             all_eye_movement_features=all_eye_movement_features,
             target_zone_names=target_zone_names,
         )
-        for k in inputs
+        for batch in batches
     )
 
-    results = pd.DataFrame(list(filter(None, results)))
+    results = pd.DataFrame([result for batch_results in results for result in batch_results if result])
     results.set_index("datetime", inplace=True)
     results.sort_index(inplace=True)
 
     return results
 
 
-def get_sliding_window(
+# Features of several windows, given by their start times and row positions in data.
+def get_sliding_windows(
     data: pd.DataFrame,
     epoch_width: int,
-    i: int,
-    feature_type: str = "numerical",
+    input_times: pd.DatetimeIndex,
+    window_starts,
+    window_ends,
     numerical_features: list[str]=None,
     binary_features: list[str]=None,
     single_eye_movement_features: list[str]=None,
     all_eye_movement_features: str = "event+eye_movement_type+eventspec",
     target_zone_names: list[str]=None,
-) -> pd.DataFrame:
-
-    min_timestamp = i
-    max_timestamp = min_timestamp + timedelta(seconds=epoch_width)
-    results = {
-        "datetime": min_timestamp,
+) -> list[dict]:
+    # The stats of the numerical columns are computed for all windows of the batch at once.
+    numerical_stats = {
+        column: get_windows_stats(data[column].to_numpy(), window_starts, window_ends, column)
+        for column in data.columns
+        if column in numerical_features
     }
 
-    relevant_data = data.loc[
-        (data.index >= min_timestamp) & (data.index < max_timestamp)
+    return [
+        get_window_features(
+            data.iloc[start:end],
+            epoch_width,
+            i,
+            numerical_features=numerical_features,
+            binary_features=binary_features,
+            target_zone_names=target_zone_names,
+            numerical_stats={column: stats[k] for column, stats in numerical_stats.items()},
+        )
+        for k, (i, start, end) in enumerate(zip(input_times, window_starts, window_ends))
     ]
 
+
+# Features of the rows of a single window starting at i.
+def get_window_features(
+    relevant_data: pd.DataFrame,
+    epoch_width: int,
+    i,
+    numerical_features: list[str]=None,
+    binary_features: list[str]=None,
+    target_zone_names: list[str]=None,
+    numerical_stats: dict[str, dict]=None,
+) -> dict:
+
+    results = {
+        "datetime": i,
+    }
+
     for column in relevant_data.columns:
 
-        if column in numerical_features:
+        if numerical_stats is not None and column in numerical_stats:
+            results.update(numerical_stats[column])
+        elif column in numerical_features:
             column_results = get_stats(relevant_data[column], column, epoch_width=epoch_width)
             results.update(column_results)
 
@@ -21,71 +21,198 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
-import datetime
 import numpy as np
 import pandas as pd
 import math
 
-from itertools import groupby
-from scipy.stats import skew, kurtosis, iqr, entropy
+from scipy.stats import entropy
 import warnings
 
 warnings.filterwarnings("error", category=RuntimeWarning)
 
+# Statistics of numerical features, in the order of the feature columns.
+NUMERICAL_STATS = ["mean", "median", "std", "q5", "q95", "iqr", "power", "skewness", "kurtosis", "n_sign_changes"]
+
+# Upper bound for the number of samples of a block of windows reduced at once.
+BLOCK_SIZE = 2 ** 20
+
+PRECISION_LOSS_MESSAGE = (
+    "Precision loss occurred in moment calculation due to catastrophic cancellation. This occurs when the data "
+    "are nearly identical. Results may be unreliable."
+)
+
+
+# Quantile of the first counts[k] values of every sorted row, with the linear interpolation of np.quantile.
+def _sorted_quantile(sorted_block, counts, q):
+    virtual_indexes = (counts - 1) * q
+    previous_indexes = np.floor(virtual_indexes)
+    gamma = virtual_indexes - previous_indexes
+    previous_indexes = np.clip(previous_indexes.astype(np.intp), 0, None)
+    next_indexes = np.minimum(previous_indexes + 1, np.maximum(counts - 1, 0))
+    previous = np.take_along_axis(sorted_block, previous_indexes[:, None], axis=1)[:, 0]
+    following = np.take_along_axis(sorted_block, next_indexes[:, None], axis=1)[:, 0]
+    difference = following - previous
+    return np.where(gamma >= 0.5, following - difference * (1 - gamma), previous + difference * gamma)
+
+
+# Powers rounded like the scalar ones in scipy's skew and kurtosis: float64 scalars use the C library pow like
+# np.float_power, other scalars are promoted to float64 and use np.power.
+def _scalar_power(values, exponent):
+    if values.dtype == np.float64:
+        return np.float_power(values, exponent)
+    return np.power(values.astype(np.float64), exponent)
+
+
+def get_block_stats(block: np.ndarray) -> dict[str, np.ndarray]:
+    """Numerical statistics of every row of a windows x samples block of equally long windows.
+
+    NaN samples are left out, but count as nonzero and as sign change. All statistics come from one sort and
+    the central moments of every row, in the precision of the block. Also returns the number of valid samples
+    and the rows where scipy's skew and kurtosis warn about catastrophic cancellation, which are NaN.
+    """
+    block = np.asarray(block)
+    if block.dtype.kind != "f":
+        block = block.astype(np.float64)
+    dtype = block.dtype
+    num_windows, num_samples = block.shape
+
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=1)
+    results = {"num_valid": counts}
+    if num_samples == 0:
+        results.update({name: np.full(num_windows, np.nan) for name in NUMERICAL_STATS})
+        results["precision_loss"] = np.zeros(num_windows, dtype=bool)
+        return results
+
+    with np.errstate(all="ignore"):
+        num_valid = counts.astype(dtype)
+        mean = np.where(valid, block, 0).sum(axis=1) / num_valid
+        deviations = np.where(valid, block - mean[:, None], 0)
+        squares = deviations**2
+        m2 = squares.sum(axis=1) / num_valid
+        m3 = (squares * deviations).sum(axis=1) / num_valid
+        m4 = (squares**2).sum(axis=1) / num_valid
+
+        resolution = np.finfo(dtype).resolution
+        precision_loss = (np.abs(deviations).max(axis=1) / np.abs(mean) < resolution * 10) & (counts > 1)
+        undefined = (m2 <= (resolution * mean) ** 2) | precision_loss
+
+        num_nonzero = (block != 0).sum(axis=1)
+        power_sums = np.where(valid, block**2, 0).sum(axis=1)
+
+        sorted_block = np.sort(block, axis=1)
+        middle = np.minimum(counts // 2, num_samples - 1)
+        upper = np.take_along_axis(sorted_block, middle[:, None], axis=1)[:, 0]
+        lower = np.take_along_axis(sorted_block, np.maximum(middle - 1, 0)[:, None], axis=1)[:, 0]
+        q25 = _sorted_quantile(sorted_block, counts, 0.25)
+        q75 = _sorted_quantile(sorted_block, counts, 0.75)
+
+        results["mean"] = mean
+        results["median"] = np.where(counts % 2 == 1, upper, (lower + upper) / 2)
+        results["std"] = np.sqrt(m2)
+        results["q5"] = _sorted_quantile(sorted_block, counts, 0.05)
+        results["q95"] = _sorted_quantile(sorted_block, counts, 0.95)
+        results["iqr"] = q75 - q25
+        results["power"] = np.divide(power_sums, num_nonzero, out=np.zeros(num_windows), where=num_nonzero > 0)
+        results["skewness"] = np.where(undefined, np.nan, m3 / _scalar_power(m2, 1.5))
+        results["kurtosis"] = np.where(undefined, np.nan, m4 / _scalar_power(m2, 2.0)) - 3
+        # Sign changes stay integers like np.nansum, only empty windows are NaN.
+        results["n_sign_changes"] = (np.diff(np.sign(block), axis=1) != 0).sum(axis=1).astype(object)
+
+    empty = counts == 0
+    for name in NUMERICAL_STATS:
+        results[name] = np.where(empty, np.nan, results[name])
+    results["precision_loss"] = precision_loss
+    return results
+
+
+# Calls reduce(block, windows) for blocks of windows of equal length, windows are the positions of the windows
+# of the block in window_starts.
+def reduce_windows(values: np.ndarray, window_starts, window_ends, reduce):
+    window_starts = np.asarray(window_starts)
+    lengths = np.asarray(window_ends) - window_starts
+    for length in np.unique(lengths):
+        windows = np.flatnonzero(lengths == length)
+        num_blocks = min(len(windows), -(-len(windows) * max(length, 1) // BLOCK_SIZE))
+        for block_windows in np.array_split(windows, num_blocks):
+            rows = window_starts[block_windows][:, None] + np.arange(length)
+            reduce(values[rows], block_windows)
+
+
+def get_windows_stats(values: np.ndarray, window_starts, window_ends, key_suffix: str = None) -> list[dict]:
+    """get_stats of many windows values[window_starts[k]:window_ends[k]] of one column.
+
+    Equally long windows are reduced together in blocks by get_block_stats.
+    """
+    values = np.asarray(values)
+    num_windows = len(window_starts)
+    stats = {name: np.empty(num_windows, dtype=object) for name in NUMERICAL_STATS}
+    precision_loss = np.zeros(num_windows, dtype=bool)
+
+    def reduce(block, windows):
+        block_stats = get_block_stats(block)
+        for name in NUMERICAL_STATS:
+            stats[name][windows] = list(block_stats[name])
+        precision_loss[windows] = block_stats["precision_loss"]
+
+    reduce_windows(values, window_starts, window_ends, reduce)
+
+    windows_results = []
+    for k, (start, end) in enumerate(zip(window_starts, window_ends)):
+        results = {name: stats[name][k] for name in NUMERICAL_STATS}
+        if precision_loss[k]:
+            print(f"Warning caught: {PRECISION_LOSS_MESSAGE} caused by: {key_suffix}")
+
+        if key_suffix is not None:
+            results = {key_suffix + "+" + key: value for key, value in results.items()}
+
+        results["agg+num_samples++"] = end - start
+        windows_results.append(results)
+
+    return windows_results
+
+
 def get_stats(data: pd.DataFrame, key_suffix: str = None, epoch_width: int = 60) -> pd.DataFrame:
+    return get_windows_stats(data.to_numpy(), [0], [len(data)], key_suffix)[0]
 
-    results = {
-        "mean": np.nan,
-        "median": np.nan,
-        "std": np.nan,
-        "q5": np.nan,
-        "q95": np.nan,
-        "iqr": np.nan,
-        "power": np.nan,
-        "skewness": np.nan,
-        "kurtosis": np.nan,
-        "n_sign_changes": np.nan,
-    }
 
-    if (len(data) > 0) and (not data.isna().all()):
-        results["mean"] = np.mean(data)
-        results["median"] = np.nanmedian(data)
-        results["std"] = np.std(data)
-        results["q5"] = np.nanquantile(data, 0.05)
-        results["q95"] = np.nanquantile(data, 0.95)
-        results["iqr"] = iqr(
-            data, nan_policy="omit"
-        )
-
-        if np.count_nonzero(data) == 0:
-            results["power"] = 0
-        else:
-            results["power"] = np.nansum([x**2 for x in data]) / np.count_nonzero(data)
-
-        try:
-            results["skewness"] = float(
-                skew(data, nan_policy="omit")
-            )
-        except RuntimeWarning as e:
-            print(f"Warning caught: {e}" + " cause by: " + key_suffix)
-
-        try:
-            results["kurtosis"] = kurtosis(
-                data, nan_policy="omit"
-            )
-        except RuntimeWarning as e:
-            print(f"Warning caught: {e}" + " caused by: " + key_suffix)
-
-        results["n_sign_changes"] = np.nansum(
-            np.diff(np.sign(data,)) != 0
-        )
+# Timedelta.total_seconds of nanosecond differences, which truncates to microseconds.
+def _total_seconds(nanoseconds):
+    microseconds = np.floor_divide(nanoseconds, 1000)
+    seconds, microseconds = np.divmod(microseconds, 10 ** 6)
+    return seconds.astype(np.float64) + microseconds / 1e6
 
-    if key_suffix is not None:
-        results = {key_suffix + "+" + k: v for k, v in results.items()}
 
-    results["agg+num_samples++"] = len(data)
+# Start positions, end positions (exclusive) and values of the runs of equal consecutive values. Like
+# itertools.groupby every NaN is a run of its own.
+def get_runs(values: np.ndarray):
+    boundaries = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], boundaries)) if len(values) else boundaries
+    ends = np.concatenate((boundaries, [len(values)])) if len(values) else boundaries
+    return starts, ends, values[starts]
 
-    return results
+
+# First and last sample of the events of the samples equal to 1. Events start where the difference to the
+# previous sample is 1 and end where it is -1, NaN differences are ignored, and a sample equal to 1 at the
+# beginning or end of the window always starts or ends an event. Starts and ends are paired in order.
+def get_event_bounds(values: np.ndarray):
+    markers = np.zeros(len(values))
+    markers[1:] = np.diff(values)
+    markers[np.isnan(markers)] = 0
+    if values[0] == 1:
+        markers[0] = 1
+    if values[-1] == 1:
+        markers[-1] = -1
+    starts = np.flatnonzero(markers == 1)
+    ends = np.flatnonzero(markers == -1)
+    num_events = min(len(starts), len(ends))
+    return starts[:num_events], ends[:num_events]
+
+
+# Event durations in seconds, one sample period of 20 ms shorter than the time between first and last sample.
+def get_event_durations(times: pd.DatetimeIndex, starts, ends):
+    nanoseconds = times.asi8[ends] - times.asi8[starts] - 20 * 10 ** 6
+    return _total_seconds(nanoseconds)
 
 
 def get_binary_event_stats(
@@ -100,37 +227,29 @@ def get_binary_event_stats(
     }
 
     if len(data) > 0:
-        data = data.copy()
-        number_all_type_events = (data['event+eye_movement_type+eventspec'].diff().fillna(0) != 0.0).sum()
-
-        # Calculate durations per event and the target zone of the event.
-        duration_events_list = []
-        amplitudes_event_list = []
-        ix = (data[key_suffix] * 1.0).diff().fillna(0)
-        if (data[key_suffix] * 1.0).iloc[0] == 1.0:
-            ix.iloc[0] = 1
-        if (data[key_suffix] * 1.0).iloc[-1] == 1.0:
-            ix.iloc[-1] = -1
-        if -1.0 in ix.unique():
-            event_times = list(zip(data.index[ix == 1], data.index[ix == -1]))
-            for event_time in event_times:
-                duration_events_list.append(
-                    (
-                        event_time[1] - event_time[0] - datetime.timedelta(seconds=0.02)
-                    ).total_seconds()
-                )
-                amplitudes_event_list.append(
-                    np.sum(np.abs(data.loc[event_time[0]:event_time[1]]['gaze+angle_change+velocity'].to_numpy())))
+        event_types = data['event+eye_movement_type+eventspec'].to_numpy(dtype=np.float64)
+        type_changes = np.diff(event_types)
+        number_all_type_events = np.count_nonzero(type_changes[~np.isnan(type_changes)])
+
+        # Calculate durations and summed absolute velocities per event.
+        values = data[key_suffix].to_numpy(dtype=np.float64)
+        starts, ends = get_event_bounds(values)
+        durations = get_event_durations(data.index, starts, ends)
+
+        # The velocities of all samples with the timestamps from the first to the last sample are summed.
+        velocities = np.abs(data['gaze+angle_change+velocity'].to_numpy())
+        if data.index.is_monotonic_increasing:
+            lows = data.index.searchsorted(data.index[starts], side="left")
+            highs = data.index.searchsorted(data.index[ends], side="right")
+        else:
+            lows, highs = starts, ends + 1
+        amplitudes = [np.sum(velocities[low:high]) for low, high in zip(lows, highs)]
 
         # Calculate average duration, frequency and percentage of the eye movement type.
-        if not duration_events_list:
-            duration_events_list.append(0)
-        if not amplitudes_event_list:
-            amplitudes_event_list.append(0)
-
-        total_duration_events = np.sum(duration_events_list)
-        total_amplitude_events = np.sum(amplitudes_event_list)
-        number_key_suffix_events = len([k for k, _ in groupby((data[key_suffix] * 1.0)) if k == 1])
+        total_duration_events = np.sum(durations) if len(durations) else np.sum([0])
+        total_amplitude_events = np.sum(amplitudes) if amplitudes else np.sum([0])
+        _, _, run_values = get_runs(values)
+        number_key_suffix_events = np.count_nonzero(run_values == 1)
 
         results['event_count'] = number_key_suffix_events
 
@@ -156,37 +275,31 @@ def get_target_zone_stats(data, target_zone_names, key_suffix: str = None, epoch
     results = {}
 
     if len(data) > 0:
-        data = data.copy()
+        # Runs of the target zone during fixations, computed once for all target zones. A run of a target
+        # zone is one of its fixation events.
+        fixation = data['event+FIXA+onehot'].to_numpy() == 1.0
+        fixation_zones = np.where(fixation, data["aoi+target_zone+"].to_numpy(dtype=np.float64), np.nan)
+        run_starts, run_ends, run_zones = get_runs(fixation_zones)
 
         # Calculate the statistics of the entire window.
         number_all_regional_events_fixations = 0
         for region_number in target_zone_names:
-            number_all_regional_events_fixations = number_all_regional_events_fixations + \
-                                                   len([k for k, _ in groupby((data["aoi+target_zone+"] == region_number) &
-                                                                              (data['event+FIXA+onehot'] == 1.0)) if k == 1])
+            number_all_regional_events_fixations += np.count_nonzero(run_zones == region_number)
+
+        # An event lasts until the first sample after it or the last sample of the window, except for an event
+        # of only the last sample, which has no duration.
+        last = len(data) - 1
+        run_ends = np.minimum(run_ends, last)
 
         for region_number in target_zone_names:
             # Calculate durations of target zone events, considering only the
             # ones belonging to fixations.
-            duration_events_list_fixations = []
-            ix_fixations = (((data["aoi+target_zone+"] == region_number) &
-                             (data['event+FIXA+onehot'] == 1.0)) * 1).diff().fillna(0)
-            if ((data["aoi+target_zone+"] == region_number) & (data['event+FIXA+onehot'] == 1.0)).iloc[0] == 1.0:
-                ix_fixations.iloc[0] = 1
-            if ((data["aoi+target_zone+"] == region_number) & (data['event+FIXA+onehot'] == 1.0)).iloc[-1] == 1.0:
-                ix_fixations.iloc[-1] = -1
-            if -1.0 in ix_fixations.unique():
-                event_times = list(zip(data.index[ix_fixations == 1], data.index[ix_fixations == -1]))
-                for event_time in event_times:
-                    duration_events_list_fixations.append(
-                        (event_time[1] - event_time[0] - datetime.timedelta(seconds=0.02)).total_seconds())
+            region_runs = (run_zones == region_number) & (run_starts < last)
+            durations = get_event_durations(data.index, run_starts[region_runs], run_ends[region_runs])
 
             # Calculate average duration and percentage of the eye movement type.
-            if not duration_events_list_fixations:
-                duration_events_list_fixations.append(0)
-            total_duration_events_fixations = np.sum(duration_events_list_fixations)
-            number_region_events_fixations = len([k for k, _ in groupby((data["aoi+target_zone+"] == region_number) &
-                                                                        (data['event+FIXA+onehot'] == 1.0)) if k == 1])
+            total_duration_events_fixations = np.sum(durations) if len(durations) else np.sum([0])
+            number_region_events_fixations = np.count_nonzero(run_zones == region_number)
 
             duration_name = 'aoi+duration_fixations+' + str(target_zone_names[region_number] + "+")
             if number_region_events_fixations > 0:
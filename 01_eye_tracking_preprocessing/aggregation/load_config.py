@@ -22,11 +22,15 @@
 #####################################################################
 
 import yaml
+from aggregation.merge_probands import MAX_MEMORY_GB
 
 class AggregationConfig:
-    def __init__(self, data_directory_processed: str, probands_selected: list[int]) -> None:
+    def __init__(
+        self, data_directory_processed: str, probands_selected: list[int], max_memory_gb: float = MAX_MEMORY_GB
+    ) -> None:
         self.data_directory_processed = data_directory_processed
         self.probands_selected = probands_selected
+        self.max_memory_gb = max_memory_gb
 
 
 # Load config parameters from yaml file.
@@ -37,4 +41,5 @@ def load_config(filename: str) -> AggregationConfig:
     return AggregationConfig(
         cfg_aggregation["data_directory_processed"],
         cfg_aggregation["probands_selected"],
+        cfg_aggregation.get("max_memory_gb", MAX_MEMORY_GB),
     )
@@ -23,11 +23,76 @@
 
 """Utility to load preprocessed eye tracking data files."""
 
+import io
+import json
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
+from processing.save_files import DATASET_DIRECTORY, METADATA_FILE
 
-def load_data(base_directory: str, proband_id: str) -> pd.DataFrame:
-    """Load the pre-processed file for a single proband."""
+# Partitioning of the dataset written by processing/save_files.py.
+PARTITIONING = ds.partitioning(
+    pa.schema([("proband", pa.string()), ("phase", pa.string()), ("scenario", pa.string())]), flavor="hive"
+)
+
+
+def load_data(
+    base_directory: str,
+    proband_id: str,
+    columns: list[str] = None,
+    phases: list[int] = None,
+    scenarios: list[str] = None,
+) -> pd.DataFrame:
+    """Load the pre-processed data of a single proband, sorted by time.
+
+    Only the given columns (the time index is always loaded) and the partitions of the given phases and scenarios
+    are read from the dataset. Probands processed before the dataset existed are read from their pickle.
+    """
+    dataset_directory = os.path.join(base_directory, DATASET_DIRECTORY)
+    if not os.path.isdir(os.path.join(dataset_directory, "proband=" + proband_id)):
+        return _load_pickle(base_directory, proband_id, columns, phases, scenarios)
+
+    filters = [("proband", "=", proband_id)]
+    if phases is not None:
+        filters.append(("phase", "in", [str(phase) for phase in phases]))
+    if scenarios is not None:
+        filters.append(("scenario", "in", [str(scenario) for scenario in scenarios]))
+
+    table = pq.read_table(
+        dataset_directory,
+        columns=columns,
+        filters=filters,
+        partitioning=PARTITIONING,
+        use_pandas_metadata=True,
+    )
+    # The partition keys are only part of the directory names, not of the processed data.
+    table = table.drop_columns([name for name in PARTITIONING.schema.names if name in table.column_names])
+    return table.to_pandas().sort_index(kind="stable")
+
+
+def load_metadata(base_directory: str, proband_id: str) -> dict:
+    """Load the phases and the selected phases, scenarios and their times of a single proband."""
+    file_path = os.path.join(base_directory, DATASET_DIRECTORY, "proband=" + proband_id, METADATA_FILE)
+    with open(file_path, "r") as f:
+        metadata = json.load(f)
+    metadata["phases"] = _from_json_table(metadata["phases"])
+    for key in ["selected_phase_times", "selected_scenario_times"]:
+        metadata[key] = list(_from_json_table(metadata[key])["values"])
+    return metadata
+
+
+def _from_json_table(table: dict) -> pd.DataFrame:
+    return pd.read_json(io.StringIO(json.dumps(table)), orient="table")
+
+
+def _load_pickle(base_directory, proband_id, columns, phases, scenarios) -> pd.DataFrame:
     file_path = os.path.join(base_directory, proband_id, "ircam", f"{proband_id}.pkl")
-    return pd.read_pickle(file_path)
+    data = pd.read_pickle(file_path)
+    if phases is not None:
+        data = data[data["groundtruth+phase+"].isin(phases)]
+    if scenarios is not None:
+        data = data[data["groundtruth+scenario+"].isin(scenarios)]
+    return data if columns is None else data[columns]
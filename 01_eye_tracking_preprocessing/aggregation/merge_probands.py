@@ -0,0 +1,122 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+"""Streaming merge of the preprocessed probands into a single time ordered parquet file."""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Default memory budget of the merge, small enough for a 16 GB node.
+MAX_MEMORY_GB = 12.0
+
+# Bounds for the number of rows read at once from every proband during the merge.
+MIN_BATCH_ROWS = 1024
+MAX_BATCH_ROWS = 2 ** 20
+
+
+def write_sorted_run(data: pd.DataFrame, filename: str, row_group_size: int = MAX_BATCH_ROWS) -> pa.Schema:
+    """Write the data of one proband sorted by its time index and return the parquet schema."""
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index(kind="stable")
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    pq.write_table(table, filename, row_group_size=row_group_size)
+    return table.schema
+
+
+def get_batch_rows(filenames: list[str], max_memory: float) -> int:
+    """Number of rows per proband and read so that all buffers of the merge fit into max_memory bytes."""
+    num_rows = 0
+    num_bytes = 0
+    for filename in filenames:
+        metadata = pq.ParquetFile(filename).metadata
+        num_rows += metadata.num_rows
+        num_bytes += sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    bytes_per_row = max(num_bytes / max(num_rows, 1), 1)
+
+    # Every proband holds up to two batches (the unmerged rest and the newly read batch) and the merged rows of
+    # all probands are copied once more when they are sorted and written.
+    batch_rows = int(max_memory / (bytes_per_row * 3 * len(filenames)))
+    return min(max(batch_rows, MIN_BATCH_ROWS), MAX_BATCH_ROWS)
+
+
+# Bring a table to the columns, column order and types of the unified schema, missing columns are null.
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _get_keys(table: pa.Table, index_column: str) -> np.ndarray:
+    return table.column(index_column).to_numpy().view(np.int64)
+
+
+def merge_sorted_runs(filenames: list[str], output_file: str, schema: pa.Schema, batch_rows: int) -> int:
+    """K-way merge of parquet files sorted by their time index into output_file and return the number of rows.
+
+    Rows with equal timestamps keep the order of the files. Only batch_rows rows of every file are read at once,
+    every merge step writes one row group.
+    """
+    index_column = schema.pandas_metadata["index_columns"][0]
+    batches = [pq.ParquetFile(filename).iter_batches(batch_size=batch_rows) for filename in filenames]
+    buffers = [None] * len(filenames)
+    exhausted = [False] * len(filenames)
+    num_rows = 0
+
+    with pq.ParquetWriter(output_file, schema) as writer:
+        while True:
+            # Refill empty buffers, a file is exhausted once all its batches are read.
+            for i, batch in enumerate(batches):
+                while not exhausted[i] and (buffers[i] is None or buffers[i].num_rows == 0):
+                    try:
+                        buffers[i] = pa.Table.from_batches([next(batch)])
+                    except StopIteration:
+                        exhausted[i] = True
+            available = [i for i, buffer in enumerate(buffers) if buffer is not None and buffer.num_rows]
+            if not available:
+                break
+
+            # All rows up to the smallest last timestamp of the buffers of unexhausted files can be merged, the
+            # following rows of these files are not smaller.
+            bounds = [_get_keys(buffers[i], index_column)[-1] for i in available if not exhausted[i]]
+            bound = min(bounds) if bounds else None
+
+            parts = []
+            for i in available:
+                if bound is None:
+                    end = buffers[i].num_rows
+                else:
+                    end = int(np.searchsorted(_get_keys(buffers[i], index_column), bound, side="right"))
+                if end:
+                    parts.append(_conform(buffers[i].slice(0, end), schema))
+                    buffers[i] = buffers[i].slice(end)
+
+            merged = pa.concat_tables(parts).combine_chunks()
+            order = np.argsort(_get_keys(merged, index_column), kind="stable")
+            writer.write_table(merged.take(order))
+            num_rows += merged.num_rows
+
+    return num_rows
@@ -0,0 +1,417 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+"""Benchmark of the sliding-window eye tracking features against the former one-mask-per-window implementation.
+
+Run from the 01_eye_tracking_preprocessing folder:
+
+    python -m benchmarks.benchmark_eye_features --minutes 10 --epoch-widths 10 30 60 120
+"""
+
+import argparse
+import datetime
+import math
+import os
+import sys
+import time
+import warnings
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+from scipy.stats import skew, kurtosis, iqr
+
+# The project root holds the processing and aggregation packages, also when this file is run as a script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregation.fct_eye_utils import get_features
+
+warnings.filterwarnings("error", category=RuntimeWarning)
+
+target_zone_names = {0: "windshield", 1: "mirror_left", 2: "mirror_right", 3: "dashboard"}
+numerical_features = ["gaze+angle_change+velocity", "gaze+angle_change+acceleration", "head+roll+velocity"]
+binary_features = ["eye+right_eye_state+", "eye+left_eye_state+", "event+FIXA+onehot", "event+SACC+onehot"]
+eventspec_features = ["event+eye_movement_peak_vel+eventspec", "event+eye_movement_duration+eventspec"]
+
+
+def make_aggregation_data(minutes: float, frequency: float = 50.0, seed: int = 0) -> pd.DataFrame:
+    # Interpolated 50 Hz eye tracking data with piecewise constant events, target zones and eye states.
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * frequency)
+    index = pd.date_range("2023-06-01 10:00", periods=n, freq="%dus" % (1000000 / frequency), tz="CET")
+    # Drop a few seconds to have windows without data.
+    keep = np.ones(n, dtype=bool)
+    for start in rng.integers(0, n, max(1, n // 20000)):
+        keep[start:start + int(rng.integers(50, 500))] = False
+
+    def runs(values, mean_length):
+        lengths = rng.geometric(1 / mean_length, n)
+        return np.repeat(rng.choice(values, len(lengths)), lengths)[:n]
+
+    eye_movement_type = runs([0, 0, 1, 2, 3], 10)
+    data = pd.DataFrame(index=index)
+    for column in numerical_features:
+        data[column] = rng.normal(0, 50, n)
+    data["eye+right_eye_state+"] = runs([True, True, True, False], 40)
+    data["eye+left_eye_state+"] = runs([True, True, True, False], 40)
+    data["event+FIXA+onehot"] = eye_movement_type == 0
+    data["event+SACC+onehot"] = eye_movement_type == 2
+    data["event+eye_movement_type+eventspec"] = eye_movement_type
+    data["aoi+target_zone+"] = runs(list(target_zone_names), 25)
+    for column in eventspec_features:
+        data[column] = runs(rng.normal(100, 30, 1000), 10)
+    return data[keep]
+
+
+# Former implementation, copied verbatim from aggregation/fct_eye_utils.py and aggregation/fct_stats.py
+# before the batched window engine: one boolean mask over all data per window.
+def get_input_times(input_data, step_size, epoch_width) -> pd.DatetimeIndex:
+    epoch_width = timedelta(seconds=epoch_width)
+    date_range = pd.date_range(
+        start=input_data.index[0].floor("s"),
+        end=input_data.index[-1].ceil("s"),
+        freq=f"{step_size}s",
+    )
+
+    # Only use timestamps where data is available.
+    filtered = date_range.to_series().apply(
+        lambda i: ((input_data.index > i) & (input_data.index < i + epoch_width)).any()
+    )
+
+    return pd.DatetimeIndex(date_range.to_series()[filtered])
+
+
+def get_sliding_window(
+    data: pd.DataFrame,
+    epoch_width: int,
+    i: int,
+    feature_type: str = "numerical",
+    numerical_features: list[str]=None,
+    binary_features: list[str]=None,
+    single_eye_movement_features: list[str]=None,
+    all_eye_movement_features: str = "event+eye_movement_type+eventspec",
+    target_zone_names: list[str]=None,
+) -> pd.DataFrame:
+
+    min_timestamp = i
+    max_timestamp = min_timestamp + timedelta(seconds=epoch_width)
+    results = {
+        "datetime": min_timestamp,
+    }
+
+    relevant_data = data.loc[
+        (data.index >= min_timestamp) & (data.index < max_timestamp)
+    ]
+
+    for column in relevant_data.columns:
+
+        if column in numerical_features:
+            column_results = get_stats(relevant_data[column], column, epoch_width=epoch_width)
+            results.update(column_results)
+
+        if column in ['eye+right_eye_state+', 'eye+left_eye_state+',
+                      'event+FIXA+onehot', 'event+SACC+onehot']:
+            column_results = get_binary_event_stats(
+                relevant_data[[column, "aoi+target_zone+", 'event+eye_movement_type+eventspec',
+                               'gaze+angle_change+velocity']], target_zone_names, column, epoch_width=epoch_width
+            )
+            results.update(column_results)
+
+        if column in ["aoi+target_zone+"]:
+            column_results = get_target_zone_stats(relevant_data[[column, 'gaze+angle_change+velocity', 'event+FIXA+onehot',
+                                                                  'event+eye_movement_type+eventspec']], target_zone_names)
+            results.update(column_results)
+
+        if column in ["event+eye_movement_peak_vel+eventspec",
+                      "event+eye_movement_avg_vel+eventspec",
+                      "event+eye_movement_med_vel+eventspec",
+                      "event+eye_movement_amp_given+eventspec",
+                      "event+eye_movement_duration+eventspec"]:
+            column_results = get_eventspec_stats(relevant_data[[column, "event+eye_movement_type+eventspec"
+                                                                  ]], target_zone_names, column)
+            results.update(column_results)
+        
+    return results
+
+
+def get_stats(data: pd.DataFrame, key_suffix: str = None, epoch_width: int = 60) -> pd.DataFrame:
+
+    results = {
+        "mean": np.nan,
+        "median": np.nan,
+        "std": np.nan,
+        "q5": np.nan,
+        "q95": np.nan,
+        "iqr": np.nan,
+        "power": np.nan,
+        "skewness": np.nan,
+        "kurtosis": np.nan,
+        "n_sign_changes": np.nan,
+    }
+
+    if (len(data) > 0) and (not data.isna().all()):
+        results["mean"] = np.mean(data)
+        results["median"] = np.nanmedian(data)
+        results["std"] = np.std(data)
+        results["q5"] = np.nanquantile(data, 0.05)
+        results["q95"] = np.nanquantile(data, 0.95)
+        results["iqr"] = iqr(
+            data, nan_policy="omit"
+        )
+
+        if np.count_nonzero(data) == 0:
+            results["power"] = 0
+        else:
+            results["power"] = np.nansum([x**2 for x in data]) / np.count_nonzero(data)
+
+        try:
+            results["skewness"] = float(
+                skew(data, nan_policy="omit")
+            )
+        except RuntimeWarning as e:
+            print(f"Warning caught: {e}" + " cause by: " + key_suffix)
+
+        try:
+            results["kurtosis"] = kurtosis(
+                data, nan_policy="omit"
+            )
+        except RuntimeWarning as e:
+            print(f"Warning caught: {e}" + " caused by: " + key_suffix)
+
+        results["n_sign_changes"] = np.nansum(
+            np.diff(np.sign(data,)) != 0
+        )
+
+    if key_suffix is not None:
+        results = {key_suffix + "+" + k: v for k, v in results.items()}
+
+    results["agg+num_samples++"] = len(data)
+
+    return results
+
+
+def get_binary_event_stats(
+    data: pd.DataFrame, target_zone_names: list[str], key_suffix: str = None, epoch_width: int = 60
+) -> pd.DataFrame:
+
+    results = {
+        'duration': np.nan,
+        'percentage_events': np.nan,
+        'amplitude': np.nan,
+        'event_count': np.nan,
+    }
+
+    if len(data) > 0:
+        data = data.copy()
+        number_all_type_events = (data['event+eye_movement_type+eventspec'].diff().fillna(0) != 0.0).sum()
+
+        # Calculate durations per event and the target zone of the event.
+        duration_events_list = []
+        amplitudes_event_list = []
+        ix = (data[key_suffix] * 1.0).diff().fillna(0)
+        if (data[key_suffix] * 1.0).iloc[0] == 1.0:
+            ix.iloc[0] = 1
+        if (data[key_suffix] * 1.0).iloc[-1] == 1.0:
+            ix.iloc[-1] = -1
+        if -1.0 in ix.unique():
+            event_times = list(zip(data.index[ix == 1], data.index[ix == -1]))
+            for event_time in event_times:
+                duration_events_list.append(
+                    (
+                        event_time[1] - event_time[0] - datetime.timedelta(seconds=0.02)
+                    ).total_seconds()
+                )
+                amplitudes_event_list.append(
+                    np.sum(np.abs(data.loc[event_time[0]:event_time[1]]['gaze+angle_change+velocity'].to_numpy())))
+
+        # Calculate average duration, frequency and percentage of the eye movement type.
+        if not duration_events_list:
+            duration_events_list.append(0)
+        if not amplitudes_event_list:
+            amplitudes_event_list.append(0)
+
+        total_duration_events = np.sum(duration_events_list)
+        total_amplitude_events = np.sum(amplitudes_event_list)
+        number_key_suffix_events = len([k for k, _ in groupby((data[key_suffix] * 1.0)) if k == 1])
+
+        results['event_count'] = number_key_suffix_events
+
+        if number_key_suffix_events > 0:
+            results["duration"] = total_duration_events / number_key_suffix_events
+            results['amplitude'] = total_amplitude_events / number_key_suffix_events
+        else:
+            results["duration"] = 0
+            results['amplitude'] = 0
+
+        if number_all_type_events > 0:
+            results['percentage_events'] = number_key_suffix_events / number_all_type_events
+        else:
+            results['percentage_events'] = 0
+
+    if key_suffix is not None:
+            results = {key_suffix + "+" + k: v for k, v in results.items()}
+
+    return results
+
+
+def get_target_zone_stats(data, target_zone_names, key_suffix: str = None, epoch_width: int = 60):
+    results = {}
+
+    if len(data) > 0:
+        data = data.copy()
+
+        # Calculate the statistics of the entire window.
+        number_all_regional_events_fixations = 0
+        for region_number in target_zone_names:
+            number_all_regional_events_fixations = number_all_regional_events_fixations + \
+                                                   len([k for k, _ in groupby((data["aoi+target_zone+"] == region_number) &
+                                                                              (data['event+FIXA+onehot'] == 1.0)) if k == 1])
+
+        for region_number in target_zone_names:
+            # Calculate durations of target zone events, considering only the
+            # ones belonging to fixations.
+            duration_events_list_fixations = []
+            ix_fixations = (((data["aoi+target_zone+"] == region_number) &
+                             (data['event+FIXA+onehot'] == 1.0)) * 1).diff().fillna(0)
+            if ((data["aoi+target_zone+"] == region_number) & (data['event+FIXA+onehot'] == 1.0)).iloc[0] == 1.0:
+                ix_fixations.iloc[0] = 1
+            if ((data["aoi+target_zone+"] == region_number) & (data['event+FIXA+onehot'] == 1.0)).iloc[-1] == 1.0:
+                ix_fixations.iloc[-1] = -1
+            if -1.0 in ix_fixations.unique():
+                event_times = list(zip(data.index[ix_fixations == 1], data.index[ix_fixations == -1]))
+                for event_time in event_times:
+                    duration_events_list_fixations.append(
+                        (event_time[1] - event_time[0] - datetime.timedelta(seconds=0.02)).total_seconds())
+
+            # Calculate average duration and percentage of the eye movement type.
+            if not duration_events_list_fixations:
+                duration_events_list_fixations.append(0)
+            total_duration_events_fixations = np.sum(duration_events_list_fixations)
+            number_region_events_fixations = len([k for k, _ in groupby((data["aoi+target_zone+"] == region_number) &
+                                                                        (data['event+FIXA+onehot'] == 1.0)) if k == 1])
+
+            duration_name = 'aoi+duration_fixations+' + str(target_zone_names[region_number] + "+")
+            if number_region_events_fixations > 0:
+                results[duration_name] = total_duration_events_fixations / number_region_events_fixations
+            else:
+                results[duration_name] = 0
+
+            # Calculate the regional gaze event percentage, by using only the fixations.
+            gaze_event_percentage = 'aoi+gaze_event_percentage+' + str(target_zone_names[region_number] + "+")
+            if number_all_regional_events_fixations > 0:
+                results[gaze_event_percentage] = number_region_events_fixations / number_all_regional_events_fixations
+            else:
+                results[gaze_event_percentage] = 0
+    return results
+
+def get_eventspec_stats(data, target_zone_names, key_suffix: str = None, epoch_width: int = 60):
+    results = {}
+
+    eye_categorization = {
+        0: "FIXA",
+        1: "PURS",
+        2: "SACC",
+        3: "ISAC",
+        4: "MISSING",
+        5: "HPSO",
+        6: "IHPS",
+        7: "ILPS",
+        8: "LPSO",
+    }
+
+    eye_moment_type = data["event+eye_movement_type+eventspec"]
+    eye_moment_type = eye_moment_type.replace(eye_categorization)
+
+    metric_name = "_".join(key_suffix.split("+")[1].split("_")[-2:])
+
+    if len(data) > 0:
+        for movement_type in ["FIXA", "SACC"]:
+            relevant_values = data[key_suffix][eye_moment_type == movement_type]
+            filtered_values = relevant_values[relevant_values.diff().ne(0)]
+            movement_type_dict = get_stats(filtered_values,
+                                           ("event+" + movement_type + "+" + metric_name))
+
+            for key, value in movement_type_dict.items():
+                if isinstance(value, float) and math.isnan(value):
+                    movement_type_dict[key] = 0
+
+            keys_to_remove = [key for key in movement_type_dict if "agg+num_samples" in key]
+            for key in keys_to_remove:
+                del movement_type_dict[key]
+                
+            results.update(movement_type_dict)
+
+    return results
+
+
+def reference_features(data: pd.DataFrame, epoch_width: int, max_windows: int) -> pd.DataFrame:
+    results = [
+        get_sliding_window(
+            data,
+            epoch_width=epoch_width,
+            i=k,
+            numerical_features=numerical_features + eventspec_features,
+            binary_features=binary_features,
+            target_zone_names=target_zone_names,
+        )
+        for k in get_input_times(data, 1, epoch_width)[:max_windows]
+    ]
+    return pd.DataFrame(results).set_index("datetime").sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="length of the synthetic recording")
+    parser.add_argument("--epoch-widths", type=int, nargs="+", default=[10, 30, 60, 120],
+                        help="window lengths in seconds")
+    parser.add_argument("--reference-windows", type=int, default=100,
+                        help="number of windows computed with the former implementation")
+    parser.add_argument("--num-cores", type=int, default=1)
+    args = parser.parse_args()
+
+    data = make_aggregation_data(args.minutes)
+    print(f"{len(data)} samples")
+    for epoch_width in args.epoch_widths:
+        start = time.perf_counter()
+        result = get_features(
+            data,
+            epoch_width=epoch_width,
+            num_cores=args.num_cores,
+            numerical_features=numerical_features + eventspec_features,
+            binary_features=binary_features,
+            target_zone_names=target_zone_names,
+        )
+        engine = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = reference_features(data, epoch_width, args.reference_windows)
+        reference = (time.perf_counter() - start) * len(result) / len(expected)
+
+        pd.testing.assert_frame_equal(result.iloc[:len(expected)], expected)
+        print(f"{epoch_width:>4} s windows: {len(result)} windows in {engine:.2f} s, "
+              f"former implementation ~{reference:.2f} s (extrapolated), speedup {reference / engine:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
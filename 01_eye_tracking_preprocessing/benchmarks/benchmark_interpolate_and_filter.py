@@ -0,0 +1,114 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+"""Benchmark of the direct resampling in interpolate_and_filter against the former union-based implementation.
+
+Run from the 01_eye_tracking_preprocessing folder:
+
+    python -m benchmarks.benchmark_interpolate_and_filter --minutes 60
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# The project root holds the processing and aggregation packages, also when this file is run as a script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.interpolate_and_filter import interpolate_and_filter
+from processing.load_raw_file import used_columns
+
+
+def make_raw_recording(minutes: float, frequency: float = 60.0, seed: int = 0) -> pd.DataFrame:
+    # DMC-like samples with jittered timestamps, dropped frames, low-confidence samples and missing values.
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * frequency)
+    steps = rng.choice([16666, 16667, 33333, 250000], n, p=[0.49, 0.49, 0.015, 0.005])
+    index = pd.Timestamp("2023-06-01 10:00", tz="CET") + pd.to_timedelta(np.cumsum(steps), unit="us")
+    data = pd.DataFrame(index=index)
+    for column in used_columns[1:]:
+        if column in ["frame_number", "target_zone", "left_eye_state", "right_eye_state"]:
+            data[column] = rng.integers(0, 4, n)
+        else:
+            data[column] = rng.normal(0, 1, n)
+    data["frame_number"] = np.arange(n)
+    data["gaze_direction_confidence"] = rng.uniform(0, 1, n)
+    data.loc[rng.random(n) < 0.05, "gaze_direction_confidence"] = 0
+    data.loc[rng.random(n) < 0.02, "left_eye_opening_mm"] = np.nan
+    return data
+
+
+# Former interpolate_and_filter: interpolation on the union of the raw and the target index.
+def reference_interpolate_and_filter(raw_data: pd.DataFrame) -> pd.DataFrame:
+    non_float_cols = raw_data.select_dtypes(include="int").columns
+    float_cols = raw_data.select_dtypes(include="float").columns
+    raw_data = raw_data[raw_data["gaze_direction_confidence"] >= 0.01]
+    target_index = pd.date_range(
+        start=raw_data.index[0].floor("s"), end=raw_data.index[-1].ceil("s"), freq="20000us"
+    )
+    raw_data = raw_data.reindex(index=raw_data.index.union(target_index).drop_duplicates())
+    raw_data.loc[:, float_cols] = raw_data.loc[:, float_cols].interpolate(
+        method="time", limit=5, limit_direction="both"
+    )
+    raw_data.loc[:, non_float_cols] = raw_data.loc[:, non_float_cols].interpolate(
+        method="nearest", limit=5, limit_direction="both"
+    )
+    raw_data = raw_data.reindex(target_index)
+    for vector in [["gaze_direction_x", "gaze_direction_y", "gaze_direction_z"],
+                   ["face_quat_x", "face_quat_y", "face_quat_z", "face_quat_w"]]:
+        raw_data[vector] = raw_data[vector].div(np.linalg.norm(raw_data[vector], axis=1), axis=0)
+    return raw_data
+
+
+def _measure(function, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(data)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30.0, help="length of the synthetic recording")
+    args = parser.parse_args()
+
+    data = make_raw_recording(args.minutes)
+    print(f"{len(data)} raw samples, {data.memory_usage().sum() / 2 ** 20:.0f} MiB")
+
+    result, duration, peak = _measure(interpolate_and_filter, data)
+    expected, reference_duration, reference_peak = _measure(reference_interpolate_and_filter, data)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    print(f"resampling: {duration:.2f} s, peak {peak:.0f} MiB")
+    print(f"former:     {reference_duration:.2f} s, peak {reference_peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
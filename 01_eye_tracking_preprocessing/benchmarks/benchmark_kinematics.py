@@ -0,0 +1,153 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+"""Benchmark of the array-based kinematics against the former per-sample loops.
+
+Run from the 01_eye_tracking_preprocessing folder:
+
+    python -m benchmarks.benchmark_kinematics --minutes 60
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# The project root holds the processing and aggregation packages, also when this file is run as a script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.calculate_kinematics import (
+    acceleration_columns,
+    calculate_kinematics,
+    velocity_columns,
+)
+
+
+def make_recording(minutes: float, frequency: float = 50.0, seed: int = 0) -> pd.DataFrame:
+    # Random walk of gaze and head angles at the DMC sampling rate, crossing the +-pi seam on purpose.
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * frequency)
+    index = pd.date_range("2023-06-01 10:00", periods=n, freq="%dus" % (1000000 / frequency), tz="CET")
+    data = pd.DataFrame(index=index)
+    for column in ["azimuth", "elevation", "roll", "pitch", "yaw"]:
+        angles = np.pi * 0.9 + np.cumsum(rng.normal(0, 0.02, n))
+        data[column] = np.angle(np.exp(1j * angles))
+    data["elevation"] = data["elevation"] / 4
+    for column in ["mideye_origin_x", "mideye_origin_y", "mideye_origin_z"]:
+        data[column] = np.cumsum(rng.normal(0, 0.5, n))
+    return data
+
+
+# Per-sample reference of the former calculate_velocity/calculate_acceleration loops (window width 1).
+def _reference_delta_angle(angle_start, angle_end):
+    delta = angle_end - angle_start
+    if delta > np.pi:
+        delta -= 2 * np.pi
+    if delta < -np.pi:
+        delta += 2 * np.pi
+    return delta
+
+
+def reference_kinematics(data: pd.DataFrame) -> pd.DataFrame:
+    values = {column: [0] for column in velocity_columns}
+    for i in range(1, len(data)):
+        s, e = i - 1, i
+        time_delta = (data.index[e] - data.index[s]).total_seconds()
+        d_az = _reference_delta_angle(data["azimuth"].iloc[s], data["azimuth"].iloc[e])
+        d_el = _reference_delta_angle(data["elevation"].iloc[s], data["elevation"].iloc[e])
+        d_head = [_reference_delta_angle(data[c].iloc[s], data[c].iloc[e]) for c in ["roll", "pitch", "yaw"]]
+        d_eye = [data[c].iloc[e] - data[c].iloc[s] for c in ["mideye_origin_x", "mideye_origin_y", "mideye_origin_z"]]
+        az_deriv, el_deriv = d_az / time_delta, d_el / time_delta
+        row = [
+            np.sqrt((np.cos(data["elevation"].iloc[i - 1]) ** 2) * (az_deriv ** 2) + (el_deriv ** 2)),
+            az_deriv,
+            el_deriv,
+            np.sqrt((d_az ** 2) + (d_el ** 2)),
+            np.arctan2(np.tan(data["elevation"].iloc[e]) - np.tan(data["elevation"].iloc[s]),
+                       np.tan(data["azimuth"].iloc[e]) - np.tan(data["azimuth"].iloc[s])),
+            *[d / time_delta for d in d_head],
+            np.linalg.norm(np.asanyarray(d_head)) / time_delta,
+            np.sqrt(sum(d ** 2 for d in d_eye)) / time_delta,
+            *[d / time_delta for d in d_eye],
+        ]
+        for column, value in zip(velocity_columns, row):
+            values[column].append(value)
+    data = data.assign(**{column: np.array(v) for column, v in values.items()})
+
+    values = {column: [0] for column in acceleration_columns}
+    for i in range(1, len(data)):
+        s, e = i - 1, i
+        time_delta = (data.index[e] - data.index[s]).total_seconds()
+        acc_az = (data["velocity_azimuth"].iloc[e] - data["velocity_azimuth"].iloc[s]) / time_delta
+        acc_el = (data["velocity_elevation"].iloc[e] - data["velocity_elevation"].iloc[s]) / time_delta
+        el, v_az, v_el = data["elevation"].iloc[i], data["velocity_azimuth"].iloc[i], data["velocity_elevation"].iloc[i]
+        acc_r_dir = -(v_el ** 2) - (v_az ** 2) * (np.cos(el) ** 2)
+        acc_az_dir = acc_az * np.cos(el) - 2 * v_el * v_az * np.sin(el)
+        acc_el_dir = acc_el + (v_az ** 2) * np.sin(el) * np.cos(el)
+        row = [np.linalg.norm(np.array([acc_r_dir, acc_az_dir, acc_el_dir])), acc_r_dir, acc_az_dir, acc_el_dir]
+        row += [(data[c].iloc[e] - data[c].iloc[s]) / time_delta for c in [
+            "velocity_roll", "velocity_pitch", "velocity_yaw", "velocity_head", "velocity_mideye_origin",
+            "velocity_mideye_origin_x", "velocity_mideye_origin_y", "velocity_mideye_origin_z"]]
+        for column, value in zip(acceleration_columns, row):
+            values[column].append(value)
+    return data.assign(**{column: np.array(v) for column, v in values.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60.0, help="length of the synthetic recording")
+    parser.add_argument("--reference-minutes", type=float, default=None,
+                        help="length used for the per-sample reference (defaults to --minutes)")
+    args = parser.parse_args()
+
+    data = make_recording(args.minutes)
+    start = time.perf_counter()
+    result = calculate_kinematics(data.copy())
+    vectorized = time.perf_counter() - start
+    print(f"array-based kinematics, {len(data)} samples: {vectorized:.3f} s")
+
+    reference_minutes = args.reference_minutes or args.minutes
+    reference_data = data.iloc[:int(reference_minutes * 60 * 50)]
+    start = time.perf_counter()
+    expected = reference_kinematics(reference_data)
+    loop = time.perf_counter() - start
+    print(f"per-sample reference, {len(reference_data)} samples: {loop:.3f} s")
+
+    scaled_loop = loop * len(data) / len(reference_data)
+    print(f"speedup: {scaled_loop / vectorized:.0f}x")
+
+    result = result.iloc[:len(reference_data)]
+    columns = velocity_columns + acceleration_columns
+    pd.testing.assert_frame_equal(result[columns], expected[columns], check_exact=False, rtol=1e-9, atol=1e-12)
+    print("all", len(velocity_columns + acceleration_columns), "columns match the per-sample reference")
+
+    gap_aware = time.perf_counter()
+    calculate_kinematics(data.copy(), window_width=5, scheme="central", max_gap=0.1)
+    print(f"array-based kinematics, central window of 5 samples, gap-aware: {time.perf_counter() - gap_aware:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+"""Benchmark of the REMODNAV primitives against the former per-sample loops.
+
+Every primitive is timed as pure Python loop (the former implementation), with the NumPy fallback and, if numba
+is installed, compiled. All results are checked to be identical to the loop. Run from the
+01_eye_tracking_preprocessing folder:
+
+    python -m benchmarks.benchmark_remodnav_primitives --minutes 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# The project root holds the processing and aggregation packages, also when this file is run as a script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark_kinematics import make_recording
+from processing.remodnav.remodnav import primitives
+
+
+# Former EyegazeClassifier._get_angle_deriv, one sample at a time.
+def reference_angle_deriv(data, angles):
+    delta_angles = []
+    for i in range(len(angles) - 1):
+        delta = max(angles[i], angles[i + 1]) - min(angles[i], angles[i + 1])
+        if np.pi < delta:
+            delta = 2 * np.pi - delta
+        if angles[i] > angles[i + 1]:
+            delta = -delta
+        delta_time = (data["time_rem"].iloc[i + 1] - data["time_rem"].iloc[i]).total_seconds()
+        delta_angles.append(delta / delta_time)
+    return np.array(delta_angles)
+
+
+def angle_deriv(data, angles):
+    return primitives.wrap_angle_deltas(angles) / primitives.get_time_deltas(data["time_rem"])
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _identical(a, b):
+    if isinstance(a, tuple):
+        return all(_identical(x, y) for x, y in zip(a, b))
+    a, b = np.asarray(a), np.asarray(b)
+    if a.dtype.kind == "f":
+        return np.array_equal(a.view(np.int64), b.view(np.int64))
+    return np.array_equal(a, b)
+
+
+def _search_all(search, vels, starts, threshold):
+    return np.array([search(vels, idx, threshold) for idx in starts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="length of the synthetic recording")
+    args = parser.parse_args()
+
+    data = make_recording(args.minutes)
+    data["time_rem"] = data.index
+    azimuth = data["azimuth"].to_numpy()
+    vels = np.abs(np.diff(azimuth, prepend=azimuth[0])) * 50 * 180 / np.pi
+    vels[np.random.default_rng(0).random(len(vels)) < 0.01] = np.nan
+    threshold = float(np.nanpercentile(vels, 90))
+    # onset/offset searches start at every above-threshold period like in the saccade detection
+    peak_starts, peak_ends = primitives._find_peak_bounds_numpy(vels, threshold)
+    print(f"{len(vels)} samples, {len(peak_starts)} peaks")
+
+    cases = [
+        ("find_peaks", (vels, threshold),
+         primitives._find_peak_bounds_loop, primitives._find_peak_bounds_numpy, primitives._find_peak_bounds),
+        ("find_movement_onsetidx", (vels, peak_starts, threshold),
+         lambda *a: _search_all(primitives._find_onsetidx_loop, *a),
+         lambda *a: _search_all(primitives._find_onsetidx_numpy, *a),
+         lambda *a: _search_all(primitives._find_onsetidx, *a)),
+        ("find_movement_offsetidx", (vels, peak_ends, threshold),
+         lambda *a: _search_all(primitives._find_offsetidx_loop, *a),
+         lambda *a: _search_all(primitives._find_offsetidx_numpy, *a),
+         lambda *a: _search_all(primitives._find_offsetidx, *a)),
+        ("filter_spikes", (azimuth,),
+         primitives._filter_spikes_loop, primitives._filter_spikes_numpy, primitives._filter_spikes),
+        ("_get_angle_deriv", (data, azimuth), reference_angle_deriv, angle_deriv, None),
+    ]
+    for name, arguments, loop, numpy_version, compiled in cases:
+        expected, loop_time = _timed(loop, *arguments)
+        result, numpy_time = _timed(numpy_version, *arguments)
+        assert _identical(result, expected), name
+        line = f"{name:>24}: loop {loop_time:8.3f} s, numpy {numpy_time:7.4f} s ({loop_time / numpy_time:6.1f}x)"
+        if primitives.HAVE_NUMBA and compiled is not None:
+            # first call compiles, time the second one
+            compiled(*arguments)
+            result, compiled_time = _timed(compiled, *arguments)
+            assert _identical(result, expected), name
+            line += f", numba {compiled_time:7.4f} s ({loop_time / compiled_time:6.1f}x)"
+        print(line)
+    print("all primitives are identical to the per-sample loops")
+
+
+if __name__ == "__main__":
+    main()
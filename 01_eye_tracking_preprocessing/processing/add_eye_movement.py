@@ -21,58 +21,41 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import numpy as np
 import pandas as pd
 
-def add_eye_movement(data: pd.DataFrame, data_eye: pd.DataFrame):
+from processing.remodnav.remodnav.primitives import total_seconds
+
+
+def add_eye_movement(data: pd.DataFrame, data_eye: pd.DataFrame, categorical: bool = False):
     """
     Adds the eye movement labels generated by remodnav to the data.
+
+    Every sample gets the attributes of the latest event started at or before it (the first event before the first
+    event start), but the event advances by at most one event per sample. Both data and data_eye have to be sorted by
+    time. With categorical, the eye movement type is stored as categorical (int8 codes) instead of strings.
     """
     data_eye["start_time"] = pd.to_datetime(data_eye["start_time"])
-    types = []
-    event_peak_vel = []
-    event_avg_vel = []
-    event_med_vel = []
-    event_amp_given = []
-    event_duration = []
-    
-    current_type = data_eye["label"].iloc[0]
-    current_peak_vel = data_eye["peak_vel"].iloc[0]
-    current_avg_vel = data_eye["avg_vel"].iloc[0]
-    current_med_vel = data_eye["med_vel"].iloc[0]
-    current_amp_given = data_eye["amp"].iloc[0]
-    current_duration = int((data_eye["end_time"].iloc[0] - 
-                            data_eye["start_time"].iloc[0]).total_seconds() * 1000)
-    
-    index_eye_next = 1
-    for i in range(len(data)):
-        if index_eye_next < len(data_eye):
-            if data.index[i] >= data_eye.index[index_eye_next]:
-                current_type = data_eye["label"].iloc[index_eye_next]
-                current_peak_vel = data_eye["peak_vel"].iloc[index_eye_next]
-                current_avg_vel = data_eye["avg_vel"].iloc[index_eye_next]
-                current_med_vel = data_eye["med_vel"].iloc[index_eye_next]
-                current_amp_given = data_eye["amp"].iloc[index_eye_next]
-                current_duration = int((data_eye["end_time"].iloc[index_eye_next] - 
-                                        data_eye["start_time"].iloc[index_eye_next]).total_seconds() * 1000)
-                index_eye_next = index_eye_next + 1
-            types.append(current_type)
-            event_peak_vel.append(current_peak_vel)
-            event_avg_vel.append(current_avg_vel)
-            event_med_vel.append(current_med_vel)
-            event_amp_given.append(current_amp_given)
-            event_duration.append(current_duration)
-            
-        elif index_eye_next == len(data_eye):
-            types.append(current_type)
-            event_peak_vel.append(current_peak_vel)
-            event_avg_vel.append(current_avg_vel)
-            event_med_vel.append(current_med_vel)
-            event_amp_given.append(current_amp_given)
-            event_duration.append(current_duration)
 
-    data["eye_movement_type"] = types
-    data["eye_movement_peak_vel"] = event_peak_vel
-    data["eye_movement_avg_vel"] = event_avg_vel
-    data["eye_movement_med_vel"] = event_med_vel
-    data["eye_movement_amp_given"] = event_amp_given
-    data["eye_movement_duration"] = event_duration
+    # Number of started events per sample (at least one), the current event then follows it with at most one step
+    # per sample: current_i = min(started_i, current_(i-1) + 1), starting with the second event before the first sample.
+    started = np.maximum(data_eye.index.searchsorted(data.index, side="right"), 1)
+    steps = np.arange(len(data))
+    events = steps + np.minimum(np.minimum.accumulate(started - steps), 2) - 1
+
+    durations = (data_eye["end_time"] - data_eye["start_time"]).to_numpy().astype("timedelta64[ns]").astype(np.int64)
+    durations = (total_seconds(durations) * 1000).astype(np.int64)
+
+    labels = data_eye["label"].to_numpy()
+    if categorical:
+        categories, codes = np.unique(labels, return_inverse=True)
+        data["eye_movement_type"] = pd.Categorical.from_codes(
+            codes[events], categories=categories
+        ).remove_unused_categories()
+    else:
+        data["eye_movement_type"] = labels[events]
+    data["eye_movement_peak_vel"] = data_eye["peak_vel"].to_numpy()[events]
+    data["eye_movement_avg_vel"] = data_eye["avg_vel"].to_numpy()[events]
+    data["eye_movement_med_vel"] = data_eye["med_vel"].to_numpy()[events]
+    data["eye_movement_amp_given"] = data_eye["amp"].to_numpy()[events]
+    data["eye_movement_duration"] = durations[events]
@@ -22,21 +22,18 @@
 #####################################################################
 
 import warnings
+from processing.interval_labels import get_interval_sizes, label_intervals
 
 def add_phase_scenario_columns(data, data_phases, selected_phases):
 
-    for _, phase in data_phases.iterrows():
-        if phase["phase"] not in selected_phases:
-            continue
-        indexer = data[
-            (data.index >= phase["start"]) & (data.index <= phase["end"])
-        ].index
-        if len(indexer) == 0:
-            warnings.warn("Driving section between " + str(phase["start"]) + " and " + str(phase["end"]) + " is empty.")
-            continue
-        data.loc[indexer, ["phase", "scenario", "variant"]] = phase[
-            ["phase", "scenario", "variant"]
-        ].values
+    phases = data_phases[[phase in selected_phases for phase in data_phases["phase"]]]
+    sizes = get_interval_sizes(data.index, phases["start"], phases["end"])
+    empty = sizes == 0
+    for start, end in zip(phases["start"][empty], phases["end"][empty]):
+        warnings.warn("Driving section between " + str(start) + " and " + str(end) + " is empty.")
+
+    # Every sample gets the phase, scenario and variant of the driving section it lies in.
+    label_intervals(data, phases[~empty], {"phase": "phase", "scenario": "scenario", "variant": "variant"})
 
     data["phase"] = data["phase"].astype(str)
 
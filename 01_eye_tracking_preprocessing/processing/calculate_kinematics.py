@@ -0,0 +1,244 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+velocity_columns = [
+    "velocity",
+    "velocity_azimuth",
+    "velocity_elevation",
+    "angle_change",
+    "direction",
+    "velocity_roll",
+    "velocity_pitch",
+    "velocity_yaw",
+    "velocity_head",
+    "velocity_mideye_origin",
+    "velocity_mideye_origin_x",
+    "velocity_mideye_origin_y",
+    "velocity_mideye_origin_z",
+]
+
+acceleration_columns = [
+    "acceleration",
+    "acceleration_r",
+    "acceleration_azimuth",
+    "acceleration_elevation",
+    "acceleration_roll",
+    "acceleration_pitch",
+    "acceleration_yaw",
+    "acceleration_head",
+    "acceleration_mideye_origin",
+    "acceleration_mideye_origin_x",
+    "acceleration_mideye_origin_y",
+    "acceleration_mideye_origin_z",
+]
+
+# Delta angle is defined such that delta will be positive if direction of change is in the direction of phi.
+# Works element-wise on arrays, angles are wrapped into [-pi, pi].
+def get_delta_angle_arctan2(angle_start, angle_end):
+    delta = np.asarray(angle_end, dtype=float) - np.asarray(angle_start, dtype=float)
+    delta = np.where(delta > np.pi, delta - 2 * np.pi, delta)
+    delta = np.where(delta < -np.pi, delta + 2 * np.pi, delta)
+    return delta
+
+
+# Time in seconds between each sample and its predecessor.
+def get_time_deltas(index: pd.DatetimeIndex) -> np.ndarray:
+    return (index[1:] - index[:-1]).total_seconds().to_numpy()
+
+
+def get_derivative_windows(
+    index: pd.DatetimeIndex,
+    window_width: int = 1,
+    scheme: str = "backward",
+    max_gap: float = None,
+    segment_starts: list[pd.Timestamp] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the start and end position of the derivative window of every sample.
+
+    The data is split into contiguous runs at non-increasing timestamps, at time gaps longer than
+    max_gap (in seconds) and before the first sample of every segment in segment_starts. Windows
+    never reach across a run: the side that would leave the run is clipped to the sample itself,
+    and samples whose window collapses (start == end) get a derivative of 0.
+    """
+    if window_width < 1:
+        raise ValueError("window_width must be at least 1, got " + str(window_width))
+    if scheme == "backward":
+        step_back, step_forward = window_width, 0
+    elif scheme == "central":
+        step_back = step_forward = int(np.ceil(float(window_width) / 2))
+    else:
+        raise ValueError("Unknown derivative scheme '" + str(scheme) + "', use 'backward' or 'central'")
+
+    positions = np.arange(len(index))
+    if len(index) == 0:
+        return positions, positions
+
+    time_deltas = get_time_deltas(index)
+    new_run = np.ones(len(index), dtype=bool)
+    new_run[1:] = time_deltas <= 0
+    if max_gap is not None:
+        new_run[1:] |= time_deltas > max_gap
+    if segment_starts is not None and len(segment_starts) > 0:
+        # A segment starts between two samples if the number of segment starts up to each of them differs.
+        starts = np.sort(pd.DatetimeIndex(segment_starts).as_unit("ns").asi8)
+        starts_passed = np.searchsorted(starts, index.as_unit("ns").asi8, side="right")
+        new_run[1:] |= starts_passed[1:] != starts_passed[:-1]
+
+    # First and last position of the run each sample belongs to.
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+    run_last = np.append(new_run[1:], True)
+    run_end = np.minimum.accumulate(np.where(run_last, positions, len(index) - 1)[::-1])[::-1]
+
+    start = positions - step_back
+    start = np.where(start < run_start, positions, start)
+    end = positions + step_forward
+    end = np.where(end > run_end, positions, end)
+    return start, end
+
+
+# Scatter the derivatives of the valid windows into a zero-filled column.
+def _fill_invalid(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    result = np.zeros(len(valid))
+    result[valid] = values
+    return result
+
+
+def calculate_velocity(
+    data: pd.DataFrame,
+    window_width: int = 1,
+    scheme: str = "backward",
+    max_gap: float = None,
+    segment_starts: list[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    start, end = get_derivative_windows(data.index, window_width, scheme, max_gap, segment_starts)
+    valid = start != end
+    start, end = start[valid], end[valid]
+
+    azimuth = data["azimuth"].to_numpy(dtype=float)
+    elevation = data["elevation"].to_numpy(dtype=float)
+    mideye_origin = data[["mideye_origin_x", "mideye_origin_y", "mideye_origin_z"]].to_numpy(dtype=float)
+    head = data[["roll", "pitch", "yaw"]].to_numpy(dtype=float)
+    time = (data.index[end] - data.index[start]).total_seconds().to_numpy()
+
+    # Calculate derivatives.
+    delta_azimuth = get_delta_angle_arctan2(azimuth[start], azimuth[end])
+    delta_elevation = get_delta_angle_arctan2(elevation[start], elevation[end])
+    azimuth_deriv = delta_azimuth / time
+    elevation_deriv = delta_elevation / time
+
+    delta_head = get_delta_angle_arctan2(head[start], head[end])
+
+    # Calculate speed of mid eye origin.
+    delta_mideye_origin = mideye_origin[end] - mideye_origin[start]
+
+    velocities = {
+        "velocity": np.sqrt((np.cos(elevation[start]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)),
+        "velocity_azimuth": azimuth_deriv,
+        "velocity_elevation": elevation_deriv,
+        # Calculate the angular change as the norm of the change in azimuth and elevation direction.
+        "angle_change": np.sqrt((delta_azimuth ** 2) + (delta_elevation ** 2)),
+        # Calculate direction as the angle between the horizontal line from the starting point and the position of
+        # the end point.
+        "direction": np.arctan2(np.tan(elevation[end]) - np.tan(elevation[start]),
+                                np.tan(azimuth[end]) - np.tan(azimuth[start])),
+        "velocity_roll": delta_head[:, 0] / time,
+        "velocity_pitch": delta_head[:, 1] / time,
+        "velocity_yaw": delta_head[:, 2] / time,
+        "velocity_head": np.linalg.norm(delta_head, axis=1) / time,
+        "velocity_mideye_origin": np.linalg.norm(delta_mideye_origin, axis=1) / time,
+        "velocity_mideye_origin_x": delta_mideye_origin[:, 0] / time,
+        "velocity_mideye_origin_y": delta_mideye_origin[:, 1] / time,
+        "velocity_mideye_origin_z": delta_mideye_origin[:, 2] / time,
+    }
+
+    for column in velocity_columns:
+        data[column] = _fill_invalid(velocities[column], valid)
+
+    return data
+
+
+def calculate_acceleration(
+    data: pd.DataFrame,
+    window_width: int = 1,
+    scheme: str = "backward",
+    max_gap: float = None,
+    segment_starts: list[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    start, end = get_derivative_windows(data.index, window_width, scheme, max_gap, segment_starts)
+    valid = start != end
+    current = np.flatnonzero(valid)
+    start, end = start[valid], end[valid]
+
+    time = (data.index[end] - data.index[start]).total_seconds().to_numpy()
+
+    # Derivatives of the velocities, the accelerations in spherical directions are evaluated at the current sample.
+    def _deriv(column):
+        values = data[column].to_numpy(dtype=float)
+        return (values[end] - values[start]) / time
+
+    elevation = data["elevation"].to_numpy(dtype=float)[current]
+    velocity_azimuth = data["velocity_azimuth"].to_numpy(dtype=float)[current]
+    velocity_elevation = data["velocity_elevation"].to_numpy(dtype=float)[current]
+
+    # Calculate accelerations in different directions.
+    acceleration_r = -(velocity_elevation ** 2) - (velocity_azimuth ** 2) * (np.cos(elevation) ** 2)
+    acceleration_azimuth = _deriv("velocity_azimuth") * np.cos(elevation) - \
+        2 * velocity_elevation * velocity_azimuth * np.sin(elevation)
+    acceleration_elevation = _deriv("velocity_elevation") + \
+        (velocity_azimuth ** 2) * np.sin(elevation) * np.cos(elevation)
+
+    accelerations = {
+        "acceleration": np.linalg.norm(
+            np.column_stack([acceleration_r, acceleration_azimuth, acceleration_elevation]), axis=1),
+        "acceleration_r": acceleration_r,
+        "acceleration_azimuth": acceleration_azimuth,
+        "acceleration_elevation": acceleration_elevation,
+        # Acceleration of head rotation.
+        "acceleration_roll": _deriv("velocity_roll"),
+        "acceleration_pitch": _deriv("velocity_pitch"),
+        "acceleration_yaw": _deriv("velocity_yaw"),
+        "acceleration_head": _deriv("velocity_head"),
+        # Acceleration of mid eye origin.
+        "acceleration_mideye_origin": _deriv("velocity_mideye_origin"),
+        "acceleration_mideye_origin_x": _deriv("velocity_mideye_origin_x"),
+        "acceleration_mideye_origin_y": _deriv("velocity_mideye_origin_y"),
+        "acceleration_mideye_origin_z": _deriv("velocity_mideye_origin_z"),
+    }
+
+    for column in acceleration_columns:
+        data[column] = _fill_invalid(accelerations[column], valid)
+
+    return data
+
+
+# Calculate all velocity and acceleration columns of gaze, head rotation and mid eye origin.
+# The keyword arguments (window_width, scheme, max_gap, segment_starts) are described in get_derivative_windows.
+def calculate_kinematics(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    data = calculate_velocity(data, **kwargs)
+    data = calculate_acceleration(data, **kwargs)
+    return data
@@ -0,0 +1,122 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Callable
+
+# Increase whenever a processing stage changes its output, this invalidates all checkpoints.
+CHECKPOINT_VERSION = 1
+
+
+def _hash(values) -> str:
+    return hashlib.blake2b(json.dumps(values, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+# Fingerprint of all files in the given directories (relative path, size and modification time).
+def get_input_key(directories: list[str]) -> str:
+    files = []
+    for directory in directories:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                files.append([os.path.relpath(path, directory), stat.st_size, stat.st_mtime_ns])
+    return _hash(sorted(files))
+
+
+# The key of a stage depends on the key of the previous stage and on its own parameters, so changing the
+# parameters of one stage invalidates this stage and all following ones.
+def get_stage_keys(input_key: str, stages: list[tuple[str, dict, Callable]]) -> list[str]:
+    keys = []
+    key = input_key
+    for name, params, _ in stages:
+        key = _hash([key, CHECKPOINT_VERSION, name, params])
+        keys.append(key)
+    return keys
+
+
+class StageCheckpoints:
+    """Content-addressed pickles of the state after the selected processing stages."""
+
+    def __init__(self, directory: str, stages: list[str]) -> None:
+        self.directory = directory
+        self.stages = stages
+
+    def get_filename(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage + "-" + key + ".pkl")
+
+    def load(self, stage: str, key: str):
+        filename = self.get_filename(stage, key)
+        if stage not in self.stages or not os.path.isfile(filename):
+            return None
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, stage: str, key: str, state: dict) -> None:
+        if stage not in self.stages:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        filename = self.get_filename(stage, key)
+        temporary_filename = filename + ".tmp" + str(os.getpid())
+        with open(temporary_filename, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_filename, filename)
+
+        # Only the latest checkpoint of every stage is kept.
+        for outdated in glob.glob(os.path.join(self.directory, stage + "-*.pkl")):
+            if outdated != filename:
+                os.remove(outdated)
+
+
+# Run the stages in order, starting after the latest stage with a checkpoint for the current inputs and parameters.
+# The durations of the stages that were run (in seconds, including saving their checkpoint) are added to timings.
+def run_stages(stages: list[tuple[str, dict, Callable]], input_key: str,
+               checkpoints: StageCheckpoints = None, timings: dict = None) -> dict:
+    keys = get_stage_keys(input_key, stages)
+
+    state = {}
+    first_stage = 0
+    if checkpoints is not None:
+        for position in reversed(range(len(stages))):
+            checkpoint = checkpoints.load(stages[position][0], keys[position])
+            if checkpoint is not None:
+                state = checkpoint
+                first_stage = position + 1
+                print("Resuming after stage " + stages[position][0])
+                break
+
+    for position in range(first_stage, len(stages)):
+        name, _, stage = stages[position]
+        start = time.perf_counter()
+        state = stage(state)
+        if checkpoints is not None:
+            checkpoints.save(name, keys[position], state)
+        if timings is not None:
+            timings[name] = time.perf_counter() - start
+
+    return state
@@ -23,6 +23,51 @@
 
 import pandas as pd
 import numpy as np
+from scipy.interpolate import interp1d
+
+# Maximum number of consecutive missing samples filled from each side.
+INTERPOLATION_LIMIT = 5
+
+
+# Values of one column on the target grid, like interpolating the union of the raw and the target index with
+# pandas (method "time" or "nearest", limit in both directions) and taking the target rows afterwards. The
+# positions of the samples in that union are used for the limit, the union itself is never built.
+def resample_column(
+    values: np.ndarray,
+    raw_times: np.ndarray,
+    raw_positions: np.ndarray,
+    target_times: np.ndarray,
+    target_positions: np.ndarray,
+    method: str,
+    limit: int = INTERPOLATION_LIMIT,
+) -> np.ndarray:
+    valid = ~np.isnan(values)
+    valid_times = raw_times[valid]
+    valid_positions = raw_positions[valid]
+    valid_values = values[valid]
+    if len(valid_values) == 0:
+        return np.full(len(target_times), np.nan)
+
+    # First valid raw sample at or after and last valid raw sample before every target time.
+    following = np.searchsorted(valid_times, target_times, side="left")
+    previous = following - 1
+    has_following = following < len(valid_times)
+    following = np.minimum(following, len(valid_times) - 1)
+    exact = has_following & (valid_times[following] == target_times)
+    near = (has_following & (valid_positions[following] - target_positions <= limit)) | (
+        (previous >= 0) & (target_positions - valid_positions[np.maximum(previous, 0)] <= limit)
+    )
+
+    if method == "time":
+        resampled = np.interp(target_times, valid_times, valid_values)
+    else:
+        resampled = interp1d(
+            valid_times, valid_values, kind=method, fill_value=np.nan, bounds_error=False
+        )(target_times)
+    resampled[~near] = np.nan
+    resampled[exact] = valid_values[following[exact]]
+    return resampled
+
 
 def interpolate_and_filter(
     raw_data: pd.DataFrame) -> pd.DataFrame:
@@ -32,6 +77,8 @@ def interpolate_and_filter(
     float_cols = raw_data.select_dtypes(include="float").columns
 
     raw_data = raw_data[raw_data["gaze_direction_confidence"] >= 0.01]
+    if not raw_data.index.is_monotonic_increasing:
+        raw_data = raw_data.sort_index()
 
     frequency = 50.0
     target_index = pd.date_range(
@@ -39,26 +86,37 @@ def interpolate_and_filter(
         end=raw_data.index[-1].ceil("s"),
         freq="%dus" % (1000000 / frequency),
     )
-    raw_data = raw_data.reindex(
-        index=raw_data.index.union(target_index).drop_duplicates()
-    )
 
-    raw_data.loc[:, float_cols] = raw_data.loc[:, float_cols].interpolate(
-        method="time", limit=5, limit_direction="both"
-    )
-    raw_data.loc[:, non_float_cols] = raw_data.loc[:, non_float_cols].interpolate(
-        method="nearest", limit=5, limit_direction="both"
-    )
-    raw_data = raw_data.reindex(target_index)
+    # Positions of the raw and target samples in the union of both indices.
+    raw_times = raw_data.index.asi8
+    target_times = target_index.asi8
+    union_times = np.union1d(raw_times, target_times)
+    raw_positions = np.searchsorted(union_times, raw_times)
+    target_positions = np.searchsorted(union_times, target_times)
+
+    # Float columns are interpolated by time and integer columns by nearest sample, all other columns keep the
+    # raw values at the target times.
+    resampled = {}
+    for column in raw_data.columns:
+        if column in float_cols or column in non_float_cols:
+            resampled[column] = resample_column(
+                raw_data[column].to_numpy(dtype=np.float64),
+                raw_times,
+                raw_positions,
+                target_times,
+                target_positions,
+                method="time" if column in float_cols else "nearest",
+            )
+        else:
+            resampled[column] = raw_data[column].reindex(target_index)
+    raw_data = pd.DataFrame(resampled, index=target_index, copy=False)
 
     # Ensure we have unit vectors again (numerical inaccuracies possible after filtering).
     gaze_direction_vector = ["gaze_direction_x", "gaze_direction_y", "gaze_direction_z"]
-    raw_data[gaze_direction_vector] = raw_data[gaze_direction_vector].div(
-        np.linalg.norm(raw_data[gaze_direction_vector], axis=1), axis=0
-    )
     quat_vector = ["face_quat_x", "face_quat_y", "face_quat_z", "face_quat_w"]
-    raw_data[quat_vector] = raw_data[quat_vector].div(
-        np.linalg.norm(raw_data[quat_vector], axis=1), axis=0
-    )
+    for vector in [gaze_direction_vector, quat_vector]:
+        vectors = raw_data[vector].to_numpy()
+        vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+        raw_data[vector] = vectors
 
     return raw_data
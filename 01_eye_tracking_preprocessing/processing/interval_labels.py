@@ -0,0 +1,83 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+import numpy as np
+import pandas as pd
+
+
+def get_interval_positions(times: pd.DatetimeIndex, starts, ends) -> np.ndarray:
+    """Position of the interval (start <= time <= end) holding each time, -1 for times outside all intervals.
+
+    If intervals overlap, a time belongs to the last of them in the order of starts and ends. Every time is located
+    with one binary search, in the sorted starts or, with overlaps, in the sorted starts and ends.
+    """
+    times = pd.DatetimeIndex(times).asi8
+    starts = pd.DatetimeIndex(starts).asi8
+    ends = pd.DatetimeIndex(ends).asi8
+    positions = np.full(len(times), -1, dtype=np.intp)
+    if len(starts) == 0:
+        return positions
+
+    order = np.argsort(starts, kind="stable")
+    sorted_starts = starts[order]
+    sorted_ends = ends[order]
+    if (sorted_starts[1:] > np.maximum.accumulate(sorted_ends)[:-1]).all():
+        candidates = np.searchsorted(sorted_starts, times, side="right") - 1
+        inside = (candidates >= 0) & (times <= sorted_ends[np.maximum(candidates, 0)])
+        positions[inside] = order[candidates[inside]]
+        return positions
+
+    # With overlaps, all times between two consecutive interval bounds lie in the same intervals. The last of them
+    # is found for every such segment, and every time is located in the sorted bounds.
+    bounds = np.unique(np.concatenate((starts, ends + 1)))
+    covering = (starts[:, None] <= bounds) & (ends[:, None] >= bounds)
+    segment_positions = np.where(covering, np.arange(len(starts))[:, None], -1).max(axis=0)
+    segments = np.searchsorted(bounds, times, side="right") - 1
+    positions[segments >= 0] = segment_positions[segments[segments >= 0]]
+    return positions
+
+
+def get_interval_sizes(times: pd.DatetimeIndex, starts, ends) -> np.ndarray:
+    """Number of times within every interval (start <= time <= end), including times of overlapping intervals."""
+    times = pd.DatetimeIndex(times).asi8
+    if not (np.diff(times) >= 0).all():
+        times = np.sort(times)
+    lower = np.searchsorted(times, pd.DatetimeIndex(starts).asi8, side="left")
+    upper = np.searchsorted(times, pd.DatetimeIndex(ends).asi8, side="right")
+    return np.maximum(upper - lower, 0)
+
+
+def label_intervals(data: pd.DataFrame, intervals: pd.DataFrame, columns: dict[str, str],
+                    start: str = "start", end: str = "end") -> np.ndarray:
+    """Set every column of data to the value of the intervals column of the interval holding its time.
+
+    columns maps the columns of data to the columns of intervals. Rows outside all intervals keep their values,
+    which are missing for new columns. Returns the interval position of every row (see get_interval_positions).
+    """
+    positions = get_interval_positions(data.index, intervals[start], intervals[end])
+    inside = positions >= 0
+    for column, interval_column in columns.items():
+        values = pd.Series(intervals[interval_column].to_numpy()).reindex(positions).to_numpy()
+        if column in data.columns:
+            values = np.where(inside, values, data[column].to_numpy())
+        data[column] = values
+    return positions
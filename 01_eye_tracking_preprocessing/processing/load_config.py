@@ -34,7 +34,12 @@ class ProcessingConfig:
         selected_scenarios: list[str],
         remodnav_args: list[str],
         confidence: float = 0.01,
-        run_probands_in_parallel: bool = False
+        run_probands_in_parallel: bool = False,
+        kinematics_args: dict = None,
+        cache_raw_files: bool = True,
+        checkpoint_stages: list[str] = None,
+        max_memory_gb: float = None,
+        memory_per_raw_byte: float = 10.0
     ) -> None:
         self.raw_input_directory = raw_input_directory
         self.preprocessed_output_directory = preprocessed_output_directory
@@ -44,6 +49,11 @@ class ProcessingConfig:
         self.selected_scenarios = selected_scenarios
         self.confidence = confidence
         self.remodnav_args = remodnav_args
+        self.kinematics_args = kinematics_args if kinematics_args is not None else {}
+        self.cache_raw_files = cache_raw_files
+        self.checkpoint_stages = checkpoint_stages if checkpoint_stages is not None else []
+        self.max_memory_gb = max_memory_gb
+        self.memory_per_raw_byte = memory_per_raw_byte
 
 
 # Load config parameters from yaml file.
@@ -53,7 +63,8 @@ def load_config(filename: str) -> ProcessingConfig:
 
     keys = ["raw_input_directory", "preprocessed_output_directory",
             "probands_selected", "run_probands_in_parallel", "selected_phases",
-            "selected_scenarios", "confidence", "remodnav_args"]
+            "selected_scenarios", "confidence", "remodnav_args", "kinematics_args",
+            "cache_raw_files", "checkpoint_stages", "max_memory_gb", "memory_per_raw_byte"]
 
     # Get the values of the given keys.
     cfg_processing_dict = {key: cfg_processing.get(key) for key in keys}
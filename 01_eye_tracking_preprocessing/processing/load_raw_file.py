@@ -22,111 +22,132 @@
 #####################################################################
 
 import datetime
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import pytz
 
+from processing.renaming_conventions import renaming_convention_dict
+
+# Data types of the columns in the DMC csv exports.
+column_dtypes = {
+    "timestamp": pa.int64(),
+    "frame_number": pa.int64(),
+    "filename": pa.string(),
+    "0_face_x": pa.int64(),
+    "0_face_y": pa.int64(),
+    "0_face_width": pa.int64(),
+    "0_face_height": pa.int64(),
+    "0_face_confidence": pa.float64(),
+    "0_face_quat_w": pa.float64(),
+    "0_face_quat_x": pa.float64(),
+    "0_face_quat_y": pa.float64(),
+    "0_face_quat_z": pa.float64(),
+    "0_face_trans_x": pa.float64(),
+    "0_face_trans_y": pa.float64(),
+    "0_face_trans_z": pa.float64(),
+    "0_face_yaw": pa.float64(),
+    "0_face_pitch": pa.float64(),
+    "0_face_roll": pa.float64(),
+    "0_mideye_origin_x": pa.float64(),
+    "0_mideye_origin_y": pa.float64(),
+    "0_mideye_origin_z": pa.float64(),
+    "0_mideye_origin_confidence": pa.float64(),
+    "0_gaze_direction_x": pa.float64(),
+    "0_gaze_direction_y": pa.float64(),
+    "0_gaze_direction_z": pa.float64(),
+    "0_gaze_direction_confidence": pa.float64(),
+    "0_gaze_direction_source": pa.int64(),
+    "0_target_zone": pa.int64(),
+    "0_left_eye_opening_mm": pa.float64(),
+    "0_left_eye_opening_percent": pa.float64(),
+    "0_left_eye_confidence": pa.float64(),
+    "0_left_eye_state": pa.int64(),
+    "0_right_eye_opening_mm": pa.float64(),
+    "0_right_eye_opening_percent": pa.float64(),
+    "0_right_eye_confidence": pa.float64(),
+    "0_right_eye_state": pa.int64(),
+    "0_drowsiness": pa.int64(),
+    "0_drowsinessTime_ms": pa.int64(),
+    "0_inattention": pa.int64(),
+    "0_inattentionTime_ms": pa.int64(),
+    "0_accumulatedInattention": pa.int64(),
+    "0_accumulatedInattentionTime_ms": pa.int64(),
+    "LeftEyeOutercorner_V1_x": pa.int64(),
+    "LeftEyeOutercorner_V1_y": pa.int64(),
+    "LeftEyeOutercorner_V1_attribute": pa.int64(),
+    "LeftEyeInnercorner_V1_x": pa.int64(),
+    "LeftEyeInnercorner_V1_y": pa.int64(),
+    "LeftEyeInnercorner_V1_attribute": pa.int64(),
+    "RightEyeOutercorner_V1_x": pa.int64(),
+    "RightEyeOutercorner_V1_y": pa.int64(),
+    "RightEyeOutercorner_V1_attribute": pa.int64(),
+    "RightEyeInnercorner_V1_x": pa.int64(),
+    "RightEyeInnercorner_V1_y": pa.int64(),
+    "RightEyeInnercorner_V1_attribute": pa.int64(),
+    "LeftMouthcorner_V1_x": pa.int64(),
+    "LeftMouthcorner_V1_y": pa.int64(),
+    "LeftMouthcorner_V1_attribute": pa.int64(),
+    "RightMouthcorner_V1_x": pa.int64(),
+    "RightMouthcorner_V1_y": pa.int64(),
+    "RightMouthcorner_V1_attribute": pa.int64(),
+    "LeftNostrilSill_V1_x": pa.int64(),
+    "LeftNostrilSill_V1_y": pa.int64(),
+    "LeftNostrilSill_V1_attribute": pa.int64(),
+    "RightNostrilSill_V1_x": pa.int64(),
+    "RightNostrilSill_V1_y": pa.int64(),
+    "RightNostrilSill_V1_attribute": pa.int64(),
+}
+
+# Columns kept from the raw files (without the "0_" prefix): every column the renaming conventions map, such that
+# the saved data keeps all of them. All other columns are not parsed.
+used_columns = [
+    column.replace("0_", "", 1) for column in column_dtypes
+    if column.replace("0_", "", 1) in renaming_convention_dict
+]
+
+
 # This function loads the raw DMC data from the csv file and returns a pandas dataframe.
-def load_file(filename: str) -> pd.DataFrame:
+# Only the given columns are loaded, columns=None loads all data columns of the file.
+def load_file(filename: str, columns: list[str] = used_columns) -> pd.DataFrame:
 
-    # Skip the first row for because of incorrect format.
-    rows_to_skip = [1]
+    with open(filename, "rb") as file:
+        column_names = file.readline().decode().rstrip("\r\n").split(";")
+        # The first row is skipped because of incorrect format, it only provides the reference timestamp.
+        first_row = file.readline().decode().rstrip("\r\n").split(";")
+        first_timestamp = int(first_row[column_names.index("timestamp")])
 
-    df = pd.read_csv(
-        filename,
-        sep=";",
-        skiprows=rows_to_skip,
-        dtype={
-            "timestamp": int,
-            "frame_number": int,
-            "filename": str,
-            "0_face_x": int,
-            "0_face_y": int,
-            "0_face_width": int,
-            "0_face_height": int,
-            "0_face_confidence": float,
-            "0_face_quat_w": float,
-            "0_face_quat_x": float,
-            "0_face_quat_y": float,
-            "0_face_quat_z": float,
-            "0_face_trans_x": float,
-            "0_face_trans_y": float,
-            "0_face_trans_z": float,
-            "0_face_yaw": float,
-            "0_face_pitch": float,
-            "0_face_roll": float,
-            "0_mideye_origin_x": float,
-            "0_mideye_origin_y": float,
-            "0_mideye_origin_z": float,
-            "0_mideye_origin_confidence": float,
-            "0_gaze_direction_x": float,
-            "0_gaze_direction_y": float,
-            "0_gaze_direction_z": float,
-            "0_gaze_direction_confidence": float,
-            "0_gaze_direction_source": int,
-            "0_target_zone": int,
-            "0_left_eye_opening_mm": float,
-            "0_left_eye_opening_percent": float,
-            "0_left_eye_confidence": float,
-            "0_left_eye_state": int,
-            "0_right_eye_opening_mm": float,
-            "0_right_eye_opening_percent": float,
-            "0_right_eye_confidence": float,
-            "0_right_eye_state": int,
-            "0_drowsiness": int,
-            "0_drowsinessTime_ms": int,
-            "0_inattention": int,
-            "0_inattentionTime_ms": int,
-            "0_accumulatedInattention": int,
-            "0_accumulatedInattentionTime_ms": int,
-            "LeftEyeOutercorner_V1_x": int,
-            "LeftEyeOutercorner_V1_y": int,
-            "LeftEyeOutercorner_V1_attribute": int,
-            "LeftEyeInnercorner_V1_x": int,
-            "LeftEyeInnercorner_V1_y": int,
-            "LeftEyeInnercorner_V1_attribute": int,
-            "RightEyeOutercorner_V1_x": int,
-            "RightEyeOutercorner_V1_y": int,
-            "RightEyeOutercorner_V1_attribute": int,
-            "RightEyeInnercorner_V1_x": int,
-            "RightEyeInnercorner_V1_y": int,
-            "RightEyeInnercorner_V1_attribute": int,
-            "LeftMouthcorner_V1_x": int,
-            "LeftMouthcorner_V1_y": int,
-            "LeftMouthcorner_V1_attribute": int,
-            "RightMouthcorner_V1_x": int,
-            "RightMouthcorner_V1_y": int,
-            "RightMouthcorner_V1_attribute": int,
-            "LeftNostrilSill_V1_x": int,
-            "LeftNostrilSill_V1_y": int,
-            "LeftNostrilSill_V1_attribute": int,
-            "RightNostrilSill_V1_x": int,
-            "RightNostrilSill_V1_y": int,
-            "RightNostrilSill_V1_attribute": int,
-        },
-    )
+        # Last column is empty and face_userid does not contain useful data.
+        include_columns = [
+            column for column in column_names
+            if column not in ["", "0_face_userid", "filename"]
+            and (columns is None or column.replace("0_", "", 1) in columns)
+        ]
+
+        # The remaining rows are parsed in one multithreaded pass.
+        table = pa_csv.read_csv(
+            file,
+            read_options=pa_csv.ReadOptions(column_names=column_names, use_threads=True),
+            parse_options=pa_csv.ParseOptions(delimiter=";"),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=include_columns,
+                column_types={column: column_dtypes[column] for column in include_columns if column in column_dtypes},
+            ),
+        )
+    df = table.to_pandas()
 
-    # Read the first row just to get the correct timestamp value.
-    first_row = pd.read_csv(filename, sep=";", nrows=1)
     timestamp = filename.split("/")[-1].split(".")[0]
     timestamp = datetime.datetime.strptime(timestamp, "%Y%m%dT%H%M%S")
-    df["timestamp"] = df["timestamp"] - first_row["timestamp"][0]
+    df["timestamp"] = df["timestamp"] - first_timestamp
 
     df.index = pd.to_datetime(
-        (df["timestamp"] + timestamp.timestamp() * 1000).map(int), unit="ms"
+        (df["timestamp"].to_numpy() + timestamp.timestamp() * 1000).astype(np.int64), unit="ms"
     )
     df.index = df.index.tz_localize(pytz.utc).tz_convert(pytz.timezone("CET"))
     df.index.names = ["time"]
 
-    # Last column is empty and face_userid does not contain useful data.
-    df = df.loc[:, ~df.columns.str.contains("Unnamed")]
-    try:
-        df.drop(columns=['0_face_userid'], inplace=True)
-    except KeyError:
-        pass
-
     # Remove all "0_" before the column names.
     df.columns = df.columns.str.replace("0_", "", 1)
 
-    df.drop(columns=["filename"], inplace=True)
-
     return df
@@ -0,0 +1,95 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Iterator
+
+# Upper bound for the number of probands processed at the same time.
+MAX_WORKERS = 32
+
+
+# Size in bytes of the raw eye tracking files of a proband.
+def get_raw_size(directory_folder: str) -> int:
+    directory_ircam = os.path.join(directory_folder, "study_day/ircam/")
+    if not os.path.isdir(directory_ircam):
+        return 0
+    return sum(
+        os.path.getsize(os.path.join(directory_ircam, file))
+        for file in os.listdir(directory_ircam)
+        if not file.startswith(".") and file.endswith(".csv")
+        and os.path.isfile(os.path.join(directory_ircam, file))
+    )
+
+
+# Run function(folder) for all folders in worker processes and yield the results in order of completion. The
+# largest probands are started first so that they do not finish long after the others. A proband is only
+# started while the estimated memory of all running probands (raw size times memory_per_raw_byte) stays below
+# max_memory, but one proband is always running.
+def run_scheduled(
+    function: Callable[[str], dict],
+    raw_sizes: dict[str, int],
+    max_workers: int = MAX_WORKERS,
+    max_memory: float = None,
+    memory_per_raw_byte: float = 10.0,
+) -> Iterator[dict]:
+    pending = sorted(raw_sizes, key=lambda folder: raw_sizes[folder], reverse=True)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+        while pending or running:
+            used_memory = sum(raw_sizes[folder] * memory_per_raw_byte for folder in running.values())
+            for folder in list(pending):
+                if len(running) >= max_workers:
+                    break
+                memory = raw_sizes[folder] * memory_per_raw_byte
+                if running and max_memory is not None and used_memory + memory > max_memory:
+                    continue
+                running[executor.submit(function, folder)] = folder
+                pending.remove(folder)
+                used_memory += memory
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder = running.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # The worker process itself failed, e.g. because it was killed when running out of memory.
+                    yield {"folder": folder, "status": "failed", "error": repr(e)}
+
+
+# Save the results of all probands of a run, with the succeeded and failed probands listed first.
+def write_run_summary(filename: str, started: datetime, results: list[dict]) -> None:
+    results = sorted(results, key=lambda result: result["folder"])
+    summary = {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "succeeded": [result["folder"] for result in results if result["status"] == "success"],
+        "failed": [result["folder"] for result in results if result["status"] != "success"],
+        "probands": results,
+    }
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(summary, f, indent=2)
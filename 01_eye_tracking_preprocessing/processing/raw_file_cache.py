@@ -0,0 +1,104 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from processing.load_raw_file import load_file, used_columns
+
+# Increase whenever load_file changes the columns or dtypes it returns, this invalidates all cached files.
+CACHE_SCHEMA_VERSION = 1
+
+CACHE_METADATA_KEY = b"raw_file_cache"
+
+
+def get_content_hash(filename: str, chunk_size: int = 1 << 24) -> str:
+    content_hash = hashlib.blake2b(digest_size=20)
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def get_cache_filename(filename: str, cache_directory: str) -> str:
+    path_hash = hashlib.blake2b(os.path.abspath(filename).encode(), digest_size=8).hexdigest()
+    return os.path.join(cache_directory, os.path.basename(filename) + "." + path_hash + ".parquet")
+
+
+def _read_cache_key(cache_filename: str) -> dict:
+    try:
+        metadata = pq.read_schema(cache_filename).metadata or {}
+        return json.loads(metadata[CACHE_METADATA_KEY])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# Cached files are valid for the same source path, schema version and columns if either size and mtime are
+# unchanged or the content hash still matches (e.g. after copying the raw data).
+def _is_valid(cached_key: dict, key: dict, filename: str) -> bool:
+    if cached_key is None:
+        return False
+    for entry in ["schema_version", "source", "columns"]:
+        if cached_key.get(entry) != key[entry]:
+            return False
+    if cached_key.get("size") != key["size"]:
+        return False
+    if cached_key.get("mtime_ns") == key["mtime_ns"]:
+        return True
+    key["content_hash"] = get_content_hash(filename)
+    return cached_key.get("content_hash") == key["content_hash"]
+
+
+# Load a raw DMC csv file through a parquet cache in cache_directory, the csv is only parsed on a cache miss.
+def load_file_cached(filename: str, cache_directory: str, columns: list[str] = used_columns) -> pd.DataFrame:
+    stat = os.stat(filename)
+    key = {
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "source": os.path.abspath(filename),
+        "columns": columns,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    cache_filename = get_cache_filename(filename, cache_directory)
+
+    if os.path.isfile(cache_filename) and _is_valid(_read_cache_key(cache_filename), key, filename):
+        return pd.read_parquet(cache_filename)
+
+    df = load_file(filename, columns=columns)
+
+    if "content_hash" not in key:
+        key["content_hash"] = get_content_hash(filename)
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), CACHE_METADATA_KEY: json.dumps(key)})
+
+    # Write to a temporary file first such that parallel or aborted runs never leave a partial cache file.
+    os.makedirs(cache_directory, exist_ok=True)
+    temporary_filename = cache_filename + ".tmp" + str(os.getpid())
+    pq.write_table(table, temporary_filename)
+    os.replace(temporary_filename, cache_filename)
+
+    return df
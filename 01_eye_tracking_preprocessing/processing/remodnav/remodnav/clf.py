@@ -9,7 +9,6 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 import numpy as np
 import pandas as pd
-from statsmodels.robust.scale import mad
 from scipy import signal
 from scipy import ndimage
 from scipy.signal import savgol_filter
@@ -19,9 +18,12 @@ from math import (
     atan2,
 )
 
+from joblib import Parallel, delayed
+
 import logging
 lgr = logging.getLogger('remodnav.clf')
 
+from . import primitives
 from .filter_velocities import filter_velocities
 
 
@@ -57,62 +59,33 @@ def find_peaks(vels, threshold):
       Each item is a tuple with start and end index of the window where
       velocities exceed the threshold.
     """
+    vels = np.asarray(vels)
+
     def _get_vels(start, end):
         v = vels[start:end]
         v = v[~np.isnan(v)]
         return v
 
-    sacs = []
-    sac_on = None
-    for i, v in enumerate(vels):
-        if sac_on is None and v > threshold:
-            # start of a saccade
-            sac_on = i
-        elif sac_on is not None and v < threshold:
-            sacs.append([
-                sac_on,
-                i,
-                _get_vels(
-                    sac_on,
-                    min(len(vels), i + 1))
-            ])
-            sac_on = None
-    if sac_on:
-        # end of data, but velocities still high
-        sacs.append([
-            sac_on,
-            len(vels) - 1,
-            _get_vels(sac_on, len(vels))])
-    return sacs
+    starts, ends = primitives.find_peak_bounds(vels, threshold)
+    return [
+        [sac_on, i, _get_vels(sac_on, min(len(vels), i + 1))]
+        for sac_on, i in zip(starts, ends)
+    ]
 
 
 def find_movement_onsetidx(vels, start_idx, sac_onset_velthresh):
-    idx = start_idx
-    while idx > 0 \
-            and (vels[idx] > sac_onset_velthresh or
-                 vels[idx] <= vels[idx - 1]):
-        # find first local minimum after vel drops below onset threshold
-        # going backwards in time
+    # find first local minimum after vel drops below onset threshold
+    # going backwards in time
 
-        # we used to do this, but it could mean detecting very long
-        # saccades that consist of (mostly) missing data
-        #         or np.isnan(vels[sacc_start])):
-        idx -= 1
-    return idx
+    # we used to also continue on NaN, but it could mean detecting very
+    # long saccades that consist of (mostly) missing data
+    return primitives.find_onsetidx(vels, start_idx, sac_onset_velthresh)
 
 
 def find_movement_offsetidx(vels, start_idx, off_velthresh):
-    idx = start_idx
     # shift saccade end index to the first element that is below the
     # velocity threshold
-    while idx < len(vels) - 1 \
-            and (vels[idx] > off_velthresh or
-                 (vels[idx] > vels[idx + 1])):
-            # we used to do this, but it could mean detecting very long
-            # saccades that consist of (mostly) missing data
-            #    or np.isnan(vels[idx])):
-        idx += 1
-    return idx
+    return primitives.find_offsetidx(vels, start_idx, off_velthresh)
 
 
 def find_psoend(velocities, sac_velthresh, sac_peak_velthresh):
@@ -150,24 +123,11 @@ def filter_spikes(data):
       methods for video-based pupil-tracking systems. Behavior Research
       Methods, Instruments, & Computers, 25(2), 137-142. doi:10.3758/bf03204486
     """
-    def _filter(arr):
-        # over all triples of neighboring samples
-        arr = arr.copy()
-        for i in range(1, len(arr) - 1):
-            if (arr[i - 1] < arr[i] and arr[i] > arr[i + 1]) \
-                    or (arr[i - 1] > arr[i] and arr[i] < arr[i + 1]):
-                # immediate sign-reversal of the difference from
-                # x-1 -> x -> x+1
-                prev_dist = abs(arr[i - 1] - arr[i])
-                next_dist = abs(arr[i + 1] - arr[i])
-                # replace x by the neighboring value that is closest
-                # in value
-                arr[i] = arr[i - 1] \
-                    if prev_dist < next_dist else arr[i + 1]
-        return arr
-
-    data['x'] = _filter(data['x'])
-    data['y'] = _filter(data['y'])
+    # over all triples of neighboring samples: on an immediate sign-reversal
+    # of the difference from x-1 -> x -> x+1, replace x by the neighboring
+    # value that is closest in value
+    data['x'] = primitives.filter_spikes(data['x'])
+    data['y'] = primitives.filter_spikes(data['y'])
     return data
 
 
@@ -185,6 +145,23 @@ def get_dilated_nan_mask(arr, iterations, max_ignore_size=None):
     return mask
 
 
+def get_chunk_starts(arr, min_gap, segment_starts=()):
+    """Sample indices at which the data can be split into independent chunks
+
+    Chunks are split in the middle of every signal loss of at least
+    `min_gap` samples and at the given segment starts (e.g. scenarios).
+    """
+    isnan = np.isnan(arr).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], isnan, [0]))))
+    gap_starts, gap_ends = edges[::2], edges[1::2]
+    long_gaps = (gap_ends - gap_starts >= max(min_gap, 1)) & \
+        (gap_starts > 0) & (gap_ends < len(arr))
+    starts = np.union1d(
+        (gap_starts[long_gaps] + gap_ends[long_gaps]) // 2,
+        np.asarray(segment_starts, dtype=int))
+    return starts[(starts > 0) & (starts < len(arr))]
+
+
 def events2bids_events_tsv(events, fname, tsoffset=0.0):
     import pytz
     utc = pytz.timezone('UTC')
@@ -323,12 +300,16 @@ class EyegazeClassifier(object):
           saccade onset.
         """
         cur_thresh = self.velthresh_startvel
+        # sort once, the velocities below any cut are a prefix of the
+        # sorted velocities (NaNs are sorted to the end)
+        sorted_vels = np.sort(np.asarray(vels, dtype=np.float64))
 
         def _get_thresh(cut):
             # helper function
-            vel_uthr = vels[vels < cut]
-            med = np.median(vel_uthr)
-            scale = mad(vel_uthr)
+            vel_uthr = sorted_vels[
+                :0 if np.isnan(cut) else np.searchsorted(sorted_vels, cut)]
+            med = primitives.sorted_median(vel_uthr)
+            scale = primitives.sorted_mad(vel_uthr, med)
             return med + 2 * self.noise_factor * scale, med, scale
 
         # re-compute threshold until value converges
@@ -378,10 +359,14 @@ class EyegazeClassifier(object):
                 data[start]['vel'],
                 data[start]['vel'])))
 
-    def __call__(self, data, classify_isp=True, sort_events=True):
-        # find threshold velocities
-        sac_peak_med_velthresh, sac_onset_med_velthresh = \
-            self.get_adaptive_saccade_velocity_velthresh(data['med_vel'])
+    def __call__(self, data, classify_isp=True, sort_events=True,
+                 velthreshs=None):
+        # find threshold velocities, unless they were determined on a
+        # larger signal this data is a chunk of
+        if velthreshs is None:
+            velthreshs = self.get_adaptive_saccade_velocity_velthresh(
+                data['med_vel'])
+        sac_peak_med_velthresh, sac_onset_med_velthresh = velthreshs
         lgr.info(
             'Global saccade MEDIAN velocity thresholds: '
             '%.1f, %.1f (onset, peak)',
@@ -439,6 +424,38 @@ class EyegazeClassifier(object):
         return sorted(events, key=lambda x: x['start_time']) \
             if sort_events else events
 
+    def classify_chunks(self, data, chunk_starts, n_jobs=1,
+                        classify_isp=True, sort_events=True):
+        """Classify independent chunks of the data in parallel
+
+        The global saccade velocity thresholds are determined on the full
+        data, every chunk is then classified on its own and the events of
+        all chunks are merged.
+
+        Parameters
+        ----------
+        data : recarray
+          Preprocessed data, see `preproc`.
+        chunk_starts : array
+          Sample indices at which a new chunk starts, e.g. from
+          `get_chunk_starts`.
+        n_jobs : int
+          Number of worker processes (joblib semantics, -1 uses all cores).
+        """
+        velthreshs = self.get_adaptive_saccade_velocity_velthresh(
+            data['med_vel'])
+        bounds = np.unique(np.concatenate(([0], chunk_starts, [len(data)])))
+        chunks = [data[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        lgr.info('Classify %i chunks', len(chunks))
+
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(self)(chunk, classify_isp, False, velthreshs)
+            for chunk in chunks)
+        events = [e for chunk_events in results for e in chunk_events]
+
+        return sorted(events, key=lambda x: x['start_time']) \
+            if sort_events else events
+
     def _detect_saccades(
             self,
             candidate_locs,
@@ -861,21 +878,9 @@ class EyegazeClassifier(object):
                 eend)
 
     def _get_angle_deriv(self, data, angles):
-        delta_angles = []
-        for i in range(len(angles) - 1):
-            delta = max(angles[i], angles[i + 1]) - min(angles[i], angles[i + 1])
-            if np.pi < delta:
-                delta = 2 * np.pi - delta
-            if angles[i] > angles[i + 1]:
-                delta = -delta
-
-            if isinstance(data, pd.DataFrame):
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).total_seconds()
-            else:
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).item() / 1e9
-            delta_angles.append(delta / delta_time)
-
-        return np.array(delta_angles)
+        delta_angles = primitives.wrap_angle_deltas(angles)
+        delta_time = primitives.get_time_deltas(data['time_rem'])
+        return delta_angles / delta_time
 
     def _calculate_median_velocity_deg(self, data, median_filter_length):
         azimuth = median_filter(data['x'], size=median_filter_length)
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Per-sample kernels of the classifier. The loops are compiled with numba if it is installed, otherwise
+# equivalent array-based NumPy versions are used. Both produce exactly the results of the original loops.
+HAVE_NUMBA = njit is not None
+
+# Number of samples the NumPy onset/offset search steps through one by one (most searches end within a few
+# samples), afterwards it compares blocks of samples starting with this size and doubling per block.
+SEARCH_BLOCK_SIZE = 32
+
+# Normalization constant of the median absolute deviation, the default of statsmodels.robust.scale.mad.
+MAD_NORMALIZATION = norm.ppf(3 / 4.)
+
+
+def _find_peak_bounds_loop(vels, threshold):
+    starts = np.empty(len(vels), np.int64)
+    ends = np.empty(len(vels), np.int64)
+    count = 0
+    on = -1
+    for i in range(len(vels)):
+        if on < 0 and vels[i] > threshold:
+            on = i
+        elif on >= 0 and vels[i] < threshold:
+            starts[count] = on
+            ends[count] = i
+            count += 1
+            on = -1
+    # a peak still open at the end of the data is only reported if it does not start at the first sample
+    if on > 0:
+        starts[count] = on
+        ends[count] = len(vels) - 1
+        count += 1
+    return starts[:count], ends[:count]
+
+
+def _find_peak_bounds_numpy(vels, threshold):
+    # Only samples above (+1) or below (-1) the threshold switch the state, NaN and equal values keep it.
+    state = np.where(vels > threshold, 1, np.where(vels < threshold, -1, 0))
+    decisive = np.flatnonzero(state)
+    decisive_state = state[decisive]
+    previous_state = np.concatenate(([-1], decisive_state[:-1]))
+    starts = decisive[(decisive_state == 1) & (previous_state == -1)]
+    ends = decisive[(decisive_state == -1) & (previous_state == 1)]
+    if len(starts) > len(ends):
+        if starts[-1] > 0:
+            ends = np.append(ends, len(vels) - 1)
+        else:
+            starts = starts[:-1]
+    return starts, ends
+
+
+def _find_onsetidx_loop(vels, idx, velthresh):
+    while idx > 0 and (vels[idx] > velthresh or vels[idx] <= vels[idx - 1]):
+        idx -= 1
+    return idx
+
+
+def _find_onsetidx_numpy(vels, idx, velthresh):
+    first = max(idx - SEARCH_BLOCK_SIZE, 0)
+    while idx > first and (vels[idx] > velthresh or vels[idx] <= vels[idx - 1]):
+        idx -= 1
+    if idx > first:
+        return idx
+    block = SEARCH_BLOCK_SIZE
+    while idx > 0:
+        low = max(idx - block, 0)
+        current = vels[low + 1:idx + 1]
+        move = (current > velthresh) | (current <= vels[low:idx])
+        stops = np.flatnonzero(~move)
+        if len(stops):
+            return low + 1 + stops[-1]
+        idx = low
+        block *= 2
+    return idx
+
+
+def _find_offsetidx_loop(vels, idx, velthresh):
+    while idx < len(vels) - 1 and (vels[idx] > velthresh or vels[idx] > vels[idx + 1]):
+        idx += 1
+    return idx
+
+
+def _find_offsetidx_numpy(vels, idx, velthresh):
+    last = min(idx + SEARCH_BLOCK_SIZE, len(vels) - 1)
+    while idx < last and (vels[idx] > velthresh or vels[idx] > vels[idx + 1]):
+        idx += 1
+    if idx < last:
+        return idx
+    block = SEARCH_BLOCK_SIZE
+    while idx < len(vels) - 1:
+        high = min(idx + block, len(vels) - 1)
+        current = vels[idx:high]
+        move = (current > velthresh) | (current > vels[idx + 1:high + 1])
+        stops = np.flatnonzero(~move)
+        if len(stops):
+            return idx + stops[0]
+        idx = high
+        block *= 2
+    return idx
+
+
+def _filter_spikes_loop(arr):
+    arr = arr.copy()
+    for i in range(1, len(arr) - 1):
+        if (arr[i - 1] < arr[i] and arr[i] > arr[i + 1]) \
+                or (arr[i - 1] > arr[i] and arr[i] < arr[i + 1]):
+            prev_dist = abs(arr[i - 1] - arr[i])
+            next_dist = abs(arr[i + 1] - arr[i])
+            arr[i] = arr[i - 1] if prev_dist < next_dist else arr[i + 1]
+    return arr
+
+
+def _despike(previous, current, following):
+    spike = ((previous < current) & (current > following)) | ((previous > current) & (current < following))
+    replacement = np.where(np.abs(previous - current) < np.abs(following - current), previous, following)
+    return np.where(spike, replacement, current)
+
+
+def _filter_spikes_numpy(arr):
+    # Every sample only depends on the already filtered previous sample, so all samples are filtered at once
+    # and then only the successors of changed samples are filtered again until nothing changes anymore.
+    filtered = arr.copy()
+    bits = np.dtype('i%d' % arr.itemsize)
+    idx = np.arange(1, len(arr) - 1)
+    while len(idx):
+        values = _despike(filtered[idx - 1], arr[idx], arr[idx + 1])
+        changed = values.view(bits) != filtered[idx].view(bits)
+        filtered[idx] = values
+        idx = idx[changed] + 1
+        idx = idx[idx < len(arr) - 1]
+    return filtered
+
+
+if HAVE_NUMBA:
+    _find_peak_bounds = njit(cache=True)(_find_peak_bounds_loop)
+    _find_onsetidx = njit(cache=True)(_find_onsetidx_loop)
+    _find_offsetidx = njit(cache=True)(_find_offsetidx_loop)
+    _filter_spikes = njit(cache=True)(_filter_spikes_loop)
+else:
+    _find_peak_bounds = _find_peak_bounds_numpy
+    _find_onsetidx = _find_onsetidx_numpy
+    _find_offsetidx = _find_offsetidx_numpy
+    _filter_spikes = _filter_spikes_numpy
+
+
+def find_peak_bounds(vels, threshold):
+    """Start and end index of all above-threshold periods, see `clf.find_peaks`."""
+    starts, ends = _find_peak_bounds(np.asarray(vels, dtype=np.float64), float(threshold))
+    return starts.tolist(), ends.tolist()
+
+
+def find_onsetidx(vels, start_idx, velthresh):
+    if start_idx <= 0:
+        return start_idx
+    return int(_find_onsetidx(np.asarray(vels, dtype=np.float64), int(start_idx), float(velthresh)))
+
+
+def find_offsetidx(vels, start_idx, velthresh):
+    if start_idx >= len(vels) - 1:
+        return start_idx
+    return int(_find_offsetidx(np.asarray(vels, dtype=np.float64), int(start_idx), float(velthresh)))
+
+
+def filter_spikes(arr):
+    return _filter_spikes(np.array(arr, dtype=np.float64))
+
+
+def wrap_angle_deltas(angles):
+    """Signed difference between successive angles (in radians) along the shorter arc."""
+    angles = np.asarray(angles, dtype=np.float64)
+    first = angles[:-1]
+    second = angles[1:]
+    # written like the builtin max/min of the former loop, which ignore a NaN in second position
+    delta = np.where(second > first, second, first) - np.where(second < first, second, first)
+    delta = np.where(np.pi < delta, 2 * np.pi - delta, delta)
+    return np.where(first > second, -delta, delta)
+
+
+def total_seconds(nanoseconds):
+    """Timedelta.total_seconds for an array of nanoseconds.
+
+    Computed from whole days, seconds and microseconds like pandas does, which
+    is not always the same float as nanoseconds / 1e9.
+    """
+    microseconds = np.floor_divide(nanoseconds, 1000)
+    days, microseconds = np.divmod(microseconds, 86400 * 10 ** 6)
+    seconds, microseconds = np.divmod(microseconds, 10 ** 6)
+    return (days * 86400 + seconds).astype(np.float64) + microseconds / 1e6
+
+
+def get_time_deltas(times):
+    """Seconds between successive timestamps.
+
+    Like Timedelta.total_seconds for pandas timestamps and like
+    timedelta64.item() / 1e9 for datetime64 arrays.
+    """
+    if isinstance(times, (pd.Series, pd.Index)):
+        # timezone aware timestamps are converted to UTC datetime64
+        deltas = np.diff(times.values).astype('timedelta64[ns]').astype(np.int64)
+        return total_seconds(deltas)
+    return np.diff(times).astype('timedelta64[ns]').astype(np.int64) / 1e9
+
+
+def sorted_median(values):
+    """Median of sorted values, computed like np.median."""
+    n = len(values)
+    if not n:
+        return np.nan
+    if n % 2:
+        return values[n // 2]
+    return (values[n // 2 - 1] + values[n // 2]) / 2
+
+
+def _kth_distance(values, center, split, k):
+    # k-th smallest (0-based) of abs(values - center) for sorted values, where values[:split] < center. The
+    # distances left of the split ascend backwards and the ones right of it ascend forwards, so the k-th
+    # smallest is found by a binary search on how many of the smallest distances are taken from the left.
+    n_left = split
+    n_right = len(values) - split
+    low = max(0, k + 1 - n_right)
+    high = min(k + 1, n_left)
+    while low < high:
+        i = (low + high) // 2
+        if abs(values[split + k - i] - center) > abs(values[split - 1 - i] - center):
+            low = i + 1
+        else:
+            high = i
+    candidates = []
+    if low > 0:
+        candidates.append(abs(values[split - low] - center))
+    if k + 1 - low > 0:
+        candidates.append(abs(values[split + k - low] - center))
+    return max(candidates)
+
+
+def sorted_mad(values, center, c=MAD_NORMALIZATION):
+    """Median absolute deviation of sorted values around center, computed like statsmodels' mad."""
+    n = len(values)
+    if not n:
+        return np.nan
+    split = np.searchsorted(values, center, side='left')
+    if n % 2:
+        return _kth_distance(values, center, split, n // 2) / c
+    return (_kth_distance(values, center, split, n // 2 - 1) / c +
+            _kth_distance(values, center, split, n // 2) / c) / 2
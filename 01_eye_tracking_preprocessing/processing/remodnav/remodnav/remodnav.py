@@ -16,6 +16,7 @@ import pandas as pd
 from .clf import (
     EyegazeClassifier,
     events2bids_events_tsv,
+    get_chunk_starts,
 )
 
 help = {
@@ -66,7 +67,7 @@ help = {
 }
 
 
-def remodnav(data, args):
+def remodnav(data, args, segment_starts=None):
     import argparse
     import inspect
     kwargs = {}
@@ -102,6 +103,18 @@ def remodnav(data, args):
     parser.add_argument(
         'plot_figure', type=str,
         help="""Set to True to plot a figure of the events, speed and coordinates/ angles.""")
+    parser.add_argument(
+        '--chunk-min-gap', dest='chunk_min_gap', metavar='<float>', type=float,
+        default=0.0,
+        help="""Classify the data in independent chunks, split at every
+        signal loss of at least this duration (in seconds) and at the segment
+        starts passed to remodnav (e.g. scenarios). The global velocity
+        thresholds are still determined on all data. 0 disables chunking.
+        [default: 0.0]""")
+    parser.add_argument(
+        '--n-jobs', dest='n_jobs', metavar='<int>', type=int, default=1,
+        help="""Number of processes classifying chunks in parallel, -1 uses
+        all cores. [default: 1]""")
     parser.add_argument(
         '--log-level', choices=('debug', 'info', 'warn', 'error'),
         metavar='level', default='warn',
@@ -153,7 +166,16 @@ def remodnav(data, args):
     data['azimuth'] = data['x']
     data['elevation'] = data['y']
 
-    events = clf(pp, classify_isp=True, sort_events=True)
+    if args.chunk_min_gap:
+        chunk_starts = get_chunk_starts(
+            pp['x'],
+            int(args.chunk_min_gap * args.sampling_rate),
+            data.index.searchsorted(segment_starts) if segment_starts else ())
+        events = clf.classify_chunks(
+            pp, chunk_starts, n_jobs=args.n_jobs, classify_isp=True,
+            sort_events=True)
+    else:
+        events = clf(pp, classify_isp=True, sort_events=True)
 
     import pytz
     data_events = pd.DataFrame(events)
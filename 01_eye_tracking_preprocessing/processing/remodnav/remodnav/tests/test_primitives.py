@@ -0,0 +1,59 @@
+import numpy as np
+from .. import primitives as p
+
+
+def _samples(n=2000):
+    # noisy velocities with ties, missing data and long ramps
+    vels = np.abs(np.cumsum(np.random.randn(n))) * 10
+    vels[::7] = np.round(vels[::7])
+    vels[np.random.rand(n) < .05] = np.nan
+    return vels
+
+
+def test_find_peak_bounds_numpy_matches_loop():
+    vels = _samples()
+    threshold = np.nanmedian(vels)
+    starts, ends = p._find_peak_bounds_numpy(vels, threshold)
+    ref_starts, ref_ends = p._find_peak_bounds_loop(vels, threshold)
+    assert np.array_equal(starts, ref_starts)
+    assert np.array_equal(ends, ref_ends)
+
+
+def test_find_movement_idx_numpy_matches_loop():
+    vels = _samples(500)
+    threshold = np.nanmedian(vels)
+    for idx in range(1, len(vels) - 1):
+        assert p._find_onsetidx_numpy(vels, idx, threshold) == \
+            p._find_onsetidx_loop(vels, idx, threshold)
+        assert p._find_offsetidx_numpy(vels, idx, threshold) == \
+            p._find_offsetidx_loop(vels, idx, threshold)
+
+
+def test_filter_spikes_numpy_matches_loop():
+    for samp in (np.random.randn(1000),
+                 np.tile([0., 1., .5, 1.5], 250) + np.random.randn(1000) * .1,
+                 _samples(1000)):
+        assert np.array_equal(
+            p._filter_spikes_numpy(samp).view(np.int64),
+            p._filter_spikes_loop(samp).view(np.int64))
+
+
+def test_wrap_angle_deltas():
+    angles = np.array([3.1, -3.1, -3.0, np.nan, 1.0, 0.5])
+    deltas = p.wrap_angle_deltas(angles)
+    assert np.allclose(deltas[:2], [6.2 - 2 * np.pi, .1])
+    # like the builtin max/min, a NaN in second position yields zero
+    assert deltas[2] == 0
+    assert np.isnan(deltas[3])
+    assert deltas[4] == -.5
+
+
+def test_sorted_median_mad():
+    from statsmodels.robust.scale import mad
+    for n in (1, 2, 3, 10, 101):
+        vels = np.sort(np.round(np.abs(np.random.randn(n)) * 50, 1))
+        med = p.sorted_median(vels)
+        assert med == np.median(vels)
+        assert p.sorted_mad(vels, med) == mad(vels)
+    assert np.isnan(p.sorted_median(np.array([])))
+    assert np.isnan(p.sorted_mad(np.array([]), np.nan))
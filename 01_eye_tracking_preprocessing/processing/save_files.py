@@ -21,35 +21,73 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import json
 import os
-import pickle
+import shutil
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-# save_files writes the results of processing into csv and pkl files.
+# The processed data of all probands is saved as one parquet dataset, partitioned by proband, phase and scenario
+# in hive style (e.g. ircam_dataset/proband=201/phase=1/scenario=highway/part-0.parquet).
+DATASET_DIRECTORY = "ircam_dataset"
+# Partition keys below the proband and the data columns holding their values.
+PARTITION_COLUMNS = {"phase": "groundtruth+phase+", "scenario": "groundtruth+scenario+"}
+# Name of the file next to the partitions of a proband that holds its phases and the selected phases and scenarios.
+METADATA_FILE = "_proband_metadata.json"
+# Directory name of a partition without a value, as used by hive and read back as null by pyarrow.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+# save_files writes the results of processing into the partitioned parquet dataset and the metadata sidecar.
 def save_files(data: pd.DataFrame, output_directory: str, folder: str, data_phases: pd.DataFrame,
                selected_phases: list[int], selected_scenarios: list[str], selected_phase_times: list[pd.Timestamp],
                selected_scenario_times: list[pd.Timestamp]):
 
-    # Define directory for save.
-    directory_save = os.path.join(
-        output_directory, folder, "ircam")
-
-    os.makedirs(directory_save, exist_ok=True)
-
-    try:
-        data.to_pickle(directory_save + '/' + folder + '.pkl')
-    except:
-        print(folder, data.info())
-    data_phases.to_csv(directory_save + '/phases_' + folder + '.csv')
-    data_phases.to_pickle(directory_save + '/phases_' +
-                          folder + '.pkl')
-    with open(directory_save + '/selected_phases.pkl', 'wb') as f:
-        pickle.dump(selected_phases, f, protocol=2)
-    with open(directory_save + '/selected_scenarios.pkl', 'wb') as f:
-        pickle.dump(selected_scenarios, f, protocol=2)
-    with open(directory_save + '/selected_phase_times.pkl', 'wb') as f:
-        pickle.dump(selected_phase_times, f, protocol=2)
-    with open(directory_save + '/selected_scenario_times.pkl', 'wb') as f:
-        pickle.dump(selected_scenario_times, f, protocol=2)
+    # Define directory for save, former results of the proband are replaced.
+    directory_save = os.path.join(output_directory, DATASET_DIRECTORY, "proband=" + folder)
+    if os.path.isdir(directory_save):
+        shutil.rmtree(directory_save)
+    os.makedirs(directory_save)
+
+    # All partitions are written with the schema of the whole frame, such that a partition whose values of a
+    # column are all missing (e.g. the scenario of the null partition) keeps the type of the column.
+    schema = pa.Schema.from_pandas(data, preserve_index=True)
+    partitions = data.groupby(list(PARTITION_COLUMNS.values()), sort=True, dropna=False)
+    for values, data_partition in partitions:
+        directory_partition = os.path.join(directory_save, *[
+            key + "=" + _get_partition_value(value) for key, value in zip(PARTITION_COLUMNS, values)
+        ])
+        os.makedirs(directory_partition)
+        pq.write_table(
+            pa.Table.from_pandas(data_partition, schema=schema, preserve_index=True),
+            os.path.join(directory_partition, "part-0.parquet"),
+        )
+
+    metadata = {
+        "phases": _to_json_table(data_phases),
+        "selected_phases": selected_phases,
+        "selected_scenarios": selected_scenarios,
+        "selected_phase_times": _to_json_table(pd.Series(selected_phase_times, dtype=object)),
+        "selected_scenario_times": _to_json_table(pd.Series(selected_scenario_times, dtype=object)),
+    }
+    with open(os.path.join(directory_save, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
 
     print('Successfully processed and saved the data from proband ' + folder)
+
+
+# Frames and series are stored in the table orient of pandas, which keeps their types and time zones.
+def _to_json_table(data) -> dict:
+    if isinstance(data, pd.Series):
+        data = pd.to_datetime(data).rename("values")
+    return json.loads(data.to_json(orient="table", date_unit="ns"))
+
+
+# Directory value of a partition, integer valued floats (e.g. phases after a merge with NaN) are written as integers.
+def _get_partition_value(value) -> str:
+    if pd.isna(value):
+        return NULL_PARTITION
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
@@ -0,0 +1,87 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The project root holds the processing and aggregation packages.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregation.load_data import load_data, load_metadata
+from processing.save_files import save_files
+
+
+def make_processed_data(n: int = 1000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.Timestamp("2023-06-01 10:00", tz="Europe/Berlin") + pd.to_timedelta(np.arange(n) * 20, unit="ms")
+    data = pd.DataFrame({
+        "gaze+azimuth+pose": rng.normal(size=n),
+        "groundtruth+phase+": rng.integers(1, 4, n),
+        "groundtruth+scenario+": rng.choice(["highway", "rural", "city"], n).astype(object),
+        "event+FIXA+onehot": rng.random(n) < 0.3,
+    }, index=index)
+    data.index.name = "time"
+    return data
+
+
+def make_phases(index: pd.DatetimeIndex) -> pd.DataFrame:
+    return pd.DataFrame({
+        "phase": [1, 2],
+        "scenario": ["highway", "rural"],
+        "start": index[[0, 100]],
+        "end": index[[99, 200]],
+        "variant": [1, 2],
+        "intervention": [False, False],
+    }, index=[3, 5])
+
+
+def save(data: pd.DataFrame, directory: str):
+    save_files(data, directory, "201", make_phases(data.index), [1, 2], ["highway"],
+               list(data.index[[0, 10]]), list(data.index[[0, 5]]))
+
+
+def test_round_trip(tmp_path):
+    data = make_processed_data()
+    save(data, str(tmp_path))
+    pd.testing.assert_frame_equal(load_data(str(tmp_path), "201"), data)
+
+    metadata = load_metadata(str(tmp_path), "201")
+    pd.testing.assert_frame_equal(metadata["phases"], make_phases(data.index))
+    assert metadata["selected_phase_times"] == list(data.index[[0, 10]])
+
+
+def test_round_trip_with_missing_scenario(tmp_path):
+    data = make_processed_data()
+    data.iloc[::4, data.columns.get_loc("groundtruth+scenario+")] = None
+    save(data, str(tmp_path))
+    assert os.path.isdir(os.path.join(str(tmp_path), "ircam_dataset", "proband=201", "phase=1",
+                                      "scenario=__HIVE_DEFAULT_PARTITION__"))
+
+    pd.testing.assert_frame_equal(load_data(str(tmp_path), "201"), data)
+
+    selected = load_data(str(tmp_path), "201", columns=["gaze+azimuth+pose"], phases=[2], scenarios=["city"])
+    expected = data[(data["groundtruth+phase+"] == 2) & (data["groundtruth+scenario+"] == "city")]
+    pd.testing.assert_frame_equal(selected, expected[["gaze+azimuth+pose"]])
@@ -38,7 +38,9 @@ class ProcessingPipeline:
                 os.path.join(self.config.data_directory, 'drive_' + str(subject) + '/'),
                 os.path.join(self.config.data_output_directory, 'drive_' + str(subject) + '/'),
                 freq=self.config.freq,
-                is_ref=False, reusing=self.config.reusing_old_df) for subject in
+                is_ref=False, reusing=self.config.reusing_old_df,
+                valid_years=self.config.valid_timestamp_years,
+                valid_range=self.config.valid_timestamp_range) for subject in
             self.config.alcohol_subjects)
 
         if self.config.set_reference_phase:
@@ -49,6 +51,8 @@ class ProcessingPipeline:
                     os.path.join(self.config.data_output_directory, 'drive_' + str(subject) + '/'),
                     freq=self.config.freq,
                     is_ref=True, reusing=self.config.reusing_old_df,
+                    valid_years=self.config.valid_timestamp_years,
+                    valid_range=self.config.valid_timestamp_range,
                     ref_phase_to=self.config.reference_phase_set_to)
                 for subject in self.config.reference_placebo_subjects)
         else:
@@ -58,4 +62,6 @@ class ProcessingPipeline:
                     os.path.join(self.config.data_directory, 'drive_' + str(subject) + '/'),
                     os.path.join(self.config.data_output_directory, 'drive_' + str(subject) + '/'),
                     freq=self.config.freq,
-                    is_ref=False, reusing=self.config.reusing_old_df) for subject in self.config.reference_placebo_subjects)
+                    is_ref=False, reusing=self.config.reusing_old_df,
+                    valid_years=self.config.valid_timestamp_years,
+                    valid_range=self.config.valid_timestamp_range) for subject in self.config.reference_placebo_subjects)
@@ -23,11 +23,11 @@
 
 from .aggregation_config import load_config
 from .aggregated_data_generate import load_agg_canlogger
-from .aggregation_function import NUMERICAL_FUNCTIONS, BINARY_FUNCTIONS
+from .aggregation_function import NUMERICAL_STATS, BINARY_FUNCTIONS
 
 __all__ = [
     'load_config',
     'load_agg_canlogger',
-    'NUMERICAL_FUNCTIONS',
+    'NUMERICAL_STATS',
     'BINARY_FUNCTIONS'
 ]
\ No newline at end of file
@@ -30,7 +30,9 @@ import glob
 from joblib import Parallel, delayed
 from datetime import timedelta
 
-from .aggregation_function import NUMERICAL_FUNCTIONS, BINARY_FUNCTIONS
+from .aggregation_function import (
+    NUMERICAL_STATS, BINARY_FUNCTIONS, PRECISION_LOSS_MESSAGE, get_block_stats, reduce_windows
+)
 from .aggregation_config import AggregationConfig
 
 import warnings
@@ -49,81 +51,103 @@ COLUMN_RENAMES = {
 }
 
 
-def get_stats_one_feature(data, key_prefix: str = None):
+def get_stats_one_feature_windows(data: pd.Series, window_starts, window_ends, key_prefix: str = None) -> list[dict]:
+    """get_stats_one_feature of the windows data.iloc[window_starts[k]:window_ends[k]] of one feature.
+
+    NaN samples are removed once for the whole feature, and the numerical statistics of equally long windows
+    are reduced together by get_block_stats.
+    """
     boolean = (data.dtypes == "boolean")
-    data_nans = data.isna().sum()
-    if data_nans > 0:
-        warnings.warn(f'Input data contains {data_nans} NaNs which will be removed')
-    data = data.dropna()
-    data = np.asanyarray(data)
+    window_starts = np.asarray(window_starts)
+    window_ends = np.asarray(window_ends)
 
-    results = {}
-    if not boolean:
-        if len(data) > 0:
-            for key, value in NUMERICAL_FUNCTIONS.items():
-                if key in ["power"]:
-                    if np.count_nonzero(data) == 0:
-                        results[key] = 0
-                        continue
+    # Bounds of the windows within the samples without NaN.
+    num_valid = np.concatenate(([0], np.cumsum(data.notna().to_numpy())))
+    valid_starts = num_valid[window_starts]
+    valid_ends = num_valid[window_ends]
+    data_nans = (window_ends - window_starts) - (valid_ends - valid_starts)
+    data = np.asanyarray(data.dropna())
 
-                if key in ["kurtosis", "skewness"]:
-                    try:
-                        if results["std"] < 1e-5:
-                            results[key] = 0.0
-                        else:
-                            results[key] = value(data)
-                    except Exception as e:
-                        print(f"Warning caught: {e}" + " - Caused by: "
-                              + key + " of "+ key_prefix + " with mean: "
+    if not boolean:
+        stats = {key: np.empty(len(window_starts), dtype=object) for key in NUMERICAL_STATS}
+        precision_loss = np.zeros(len(window_starts), dtype=bool)
+
+        def reduce(block, windows):
+            block_stats = get_block_stats(block)
+            for key in NUMERICAL_STATS:
+                stats[key][windows] = list(block_stats[key])
+            precision_loss[windows] = block_stats["precision_loss"]
+
+        reduce_windows(data, valid_starts, valid_ends, reduce)
+
+    windows_results = []
+    for k, (start, end) in enumerate(zip(valid_starts, valid_ends)):
+        if data_nans[k] > 0:
+            warnings.warn(f'Input data contains {data_nans[k]} NaNs which will be removed')
+
+        results = {}
+        if not boolean:
+            if end > start:
+                for key in NUMERICAL_STATS:
+                    results[key] = stats[key][k]
+
+                for key in ["skewness", "kurtosis"]:
+                    if results["std"] < 1e-5:
+                        results[key] = 0.0
+                    elif precision_loss[k]:
+                        print(f"Warning caught: {PRECISION_LOSS_MESSAGE}" + " - Caused by: "
+                              + key + " of " + key_prefix + " with mean: "
                               + str(results["mean"]) + "and STD:"
                               + str(results["std"]))
                         results[key] = 0.0
-                    continue
-                results[key] = value(data)
-        else:
-            for key in NUMERICAL_FUNCTIONS.keys():
-                results[key] = np.nan
-
-    else:
-        try:
-            if len(data) > 0:
-                for key, value in BINARY_FUNCTIONS.items():
-                    results[key] = value(data)
             else:
-                for key in BINARY_FUNCTIONS.keys():
+                for key in NUMERICAL_STATS:
                     results[key] = np.nan
-        except Exception as e:
-            print(e)
 
-    if key_prefix is not None:
-        results = {key_prefix + '+' + k: v for k, v in results.items()}
-    return results
+        else:
+            try:
+                if end > start:
+                    for key, value in BINARY_FUNCTIONS.items():
+                        results[key] = value(data[start:end])
+                else:
+                    for key in BINARY_FUNCTIONS.keys():
+                        results[key] = np.nan
+            except Exception as e:
+                print(e)
 
+        if key_prefix is not None:
+            results = {key_prefix + '+' + k: v for k, v in results.items()}
+        windows_results.append(results)
 
-def __get_stats_window(data: pd.DataFrame, features, epoch_width, start, window_size_sec: int, freq: int):
-    end = start + epoch_width
-    window = data.loc[start:end]
-    window = window[:-1]
-    results = {
-        'datetime': start,
-        'agg+proportion_num_samples+CAN+': len(window) / (window_size_sec * freq)
-    }
+    return windows_results
 
-    for column in features:
-        column_agg = get_stats_one_feature(window[column], key_prefix=f'{column}')
-        results.update(column_agg)
-    return results
+
+def get_stats_one_feature(data, key_prefix: str = None):
+    return get_stats_one_feature_windows(data, [0], [len(data)], key_prefix)[0]
 
 
 def generate_canlogger_window(subject: int, data: pd.DataFrame, window_size_sec: int, freq: int, shift: int, features):
-    input_data = data.copy()
     epoch_width = timedelta(seconds=window_size_sec)
 
     date_range = pd.date_range(start=data.index[0].ceil('s'), end=data.index[-1].floor('s'),
                                freq=f'{shift}s')
-    results = Parallel(n_jobs=1)(
-        delayed(__get_stats_window)(input_data, features, epoch_width, start, window_size_sec, freq) for start in
-        date_range)
+
+    # A window holds the rows from its start to its end, both included, without the last of these rows.
+    window_starts = data.index.searchsorted(date_range, side='left')
+    window_ends = np.maximum(data.index.searchsorted(date_range + epoch_width, side='right') - 1, window_starts)
+
+    results = [
+        {
+            'datetime': start,
+            'agg+proportion_num_samples+CAN+': (window_end - window_start) / (window_size_sec * freq)
+        }
+        for start, window_start, window_end in zip(date_range, window_starts, window_ends)
+    ]
+    for column in features:
+        column_aggs = get_stats_one_feature_windows(data[column], window_starts, window_ends, key_prefix=f'{column}')
+        for result, column_agg in zip(results, column_aggs):
+            result.update(column_agg)
+
     results = pd.DataFrame(list(filter(None, results)))
     if len(results) == 0:
         return None
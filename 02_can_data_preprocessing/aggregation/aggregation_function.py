@@ -22,20 +22,9 @@
 #####################################################################
 
 import numpy as np
-from scipy.stats import skew, kurtosis, iqr
 
-NUMERICAL_FUNCTIONS = {
-    'mean': np.mean,
-    'median': np.nanmedian,
-    'std': np.std,
-    'q5': lambda x: np.nanquantile(x, 0.05),
-    'q95': lambda x: np.nanquantile(x, 0.95),
-    'iqr': lambda x: iqr(x, nan_policy="omit"),
-    'power': lambda x: np.nansum(x ** 2) / np.count_nonzero(x),
-    'skewness': lambda x: skew(x, nan_policy="omit"),
-    'kurtosis': lambda x: kurtosis(x, nan_policy="omit"),
-    'n_sign_changes': lambda x: np.nansum(np.diff(np.sign(x)) != 0),
-}
+# Statistics of numerical features, computed for blocks of windows by get_block_stats.
+NUMERICAL_STATS = ('mean', 'median', 'std', 'q5', 'q95', 'iqr', 'power', 'skewness', 'kurtosis', 'n_sign_changes')
 
 
 BINARY_FUNCTIONS = {
@@ -44,3 +33,107 @@ BINARY_FUNCTIONS = {
     'std': np.std,
 }
 
+# Upper bound for the number of samples of a block of windows reduced at once.
+BLOCK_SIZE = 2 ** 20
+
+PRECISION_LOSS_MESSAGE = (
+    "Precision loss occurred in moment calculation due to catastrophic cancellation. This occurs when the data "
+    "are nearly identical. Results may be unreliable."
+)
+
+
+# Quantile of the first counts[k] values of every sorted row, with the linear interpolation of np.quantile.
+def _sorted_quantile(sorted_block, counts, q):
+    virtual_indexes = (counts - 1) * q
+    previous_indexes = np.floor(virtual_indexes)
+    gamma = virtual_indexes - previous_indexes
+    previous_indexes = np.clip(previous_indexes.astype(np.intp), 0, None)
+    next_indexes = np.minimum(previous_indexes + 1, np.maximum(counts - 1, 0))
+    previous = np.take_along_axis(sorted_block, previous_indexes[:, None], axis=1)[:, 0]
+    following = np.take_along_axis(sorted_block, next_indexes[:, None], axis=1)[:, 0]
+    difference = following - previous
+    return np.where(gamma >= 0.5, following - difference * (1 - gamma), previous + difference * gamma)
+
+
+# Powers rounded like the scalar ones in scipy's skew and kurtosis: float64 scalars use the C library pow like
+# np.float_power, other scalars are promoted to float64 and use np.power.
+def _scalar_power(values, exponent):
+    if values.dtype == np.float64:
+        return np.float_power(values, exponent)
+    return np.power(values.astype(np.float64), exponent)
+
+
+def get_block_stats(block: np.ndarray) -> dict[str, np.ndarray]:
+    """NUMERICAL_STATS of every row of a windows x samples block of equally long windows.
+
+    NaN samples are left out, but count as nonzero and as sign change. All statistics come from one sort and
+    the central moments of every row, in the precision of the block. Also returns the number of valid samples
+    and the rows where scipy's skew and kurtosis warn about catastrophic cancellation, which are NaN.
+    """
+    block = np.asarray(block)
+    if block.dtype.kind != "f":
+        block = block.astype(np.float64)
+    dtype = block.dtype
+    num_windows, num_samples = block.shape
+
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=1)
+    results = {"num_valid": counts}
+    if num_samples == 0:
+        results.update({name: np.full(num_windows, np.nan) for name in NUMERICAL_STATS})
+        results["precision_loss"] = np.zeros(num_windows, dtype=bool)
+        return results
+
+    with np.errstate(all="ignore"):
+        num_valid = counts.astype(dtype)
+        mean = np.where(valid, block, 0).sum(axis=1) / num_valid
+        deviations = np.where(valid, block - mean[:, None], 0)
+        squares = deviations**2
+        m2 = squares.sum(axis=1) / num_valid
+        m3 = (squares * deviations).sum(axis=1) / num_valid
+        m4 = (squares**2).sum(axis=1) / num_valid
+
+        resolution = np.finfo(dtype).resolution
+        precision_loss = (np.abs(deviations).max(axis=1) / np.abs(mean) < resolution * 10) & (counts > 1)
+        undefined = (m2 <= (resolution * mean) ** 2) | precision_loss
+
+        num_nonzero = (block != 0).sum(axis=1)
+        power_sums = np.where(valid, block**2, 0).sum(axis=1)
+
+        sorted_block = np.sort(block, axis=1)
+        middle = np.minimum(counts // 2, num_samples - 1)
+        upper = np.take_along_axis(sorted_block, middle[:, None], axis=1)[:, 0]
+        lower = np.take_along_axis(sorted_block, np.maximum(middle - 1, 0)[:, None], axis=1)[:, 0]
+        q25 = _sorted_quantile(sorted_block, counts, 0.25)
+        q75 = _sorted_quantile(sorted_block, counts, 0.75)
+
+        results["mean"] = mean
+        results["median"] = np.where(counts % 2 == 1, upper, (lower + upper) / 2)
+        results["std"] = np.sqrt(m2)
+        results["q5"] = _sorted_quantile(sorted_block, counts, 0.05)
+        results["q95"] = _sorted_quantile(sorted_block, counts, 0.95)
+        results["iqr"] = q75 - q25
+        results["power"] = np.divide(power_sums, num_nonzero, out=np.zeros(num_windows), where=num_nonzero > 0)
+        results["skewness"] = np.where(undefined, np.nan, m3 / _scalar_power(m2, 1.5))
+        results["kurtosis"] = np.where(undefined, np.nan, m4 / _scalar_power(m2, 2.0)) - 3
+        # Sign changes stay integers like np.nansum, only empty windows are NaN.
+        results["n_sign_changes"] = (np.diff(np.sign(block), axis=1) != 0).sum(axis=1).astype(object)
+
+    empty = counts == 0
+    for name in NUMERICAL_STATS:
+        results[name] = np.where(empty, np.nan, results[name])
+    results["precision_loss"] = precision_loss
+    return results
+
+
+# Calls reduce(block, windows) for blocks of windows of equal length, windows are the positions of the windows
+# of the block in window_starts.
+def reduce_windows(values: np.ndarray, window_starts, window_ends, reduce):
+    window_starts = np.asarray(window_starts)
+    lengths = np.asarray(window_ends) - window_starts
+    for length in np.unique(lengths):
+        windows = np.flatnonzero(lengths == length)
+        num_blocks = min(len(windows), -(-len(windows) * max(length, 1) // BLOCK_SIZE))
+        for block_windows in np.array_split(windows, num_blocks):
+            rows = window_starts[block_windows][:, None] + np.arange(length)
+            reduce(values[rows], block_windows)
@@ -23,14 +23,21 @@
 
 import glob
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 import traceback
 
-from .helper import merge_with_scenario, fix_the_timestamp
+from .helper import merge_with_scenario, fix_the_timestamp, VALID_YEARS
 
 from .can_fill_limits import FILL_LIMITS
 
+# Columns of the raw CAN files that are used, all other columns are not read.
+CAN_COLUMNS = ['timestampMs', 'url', 'name', 'valueDouble', 'valueString']
+# Number of threads reading the CAN files of a subject.
+READ_THREADS = 4
+
 def __fillna_with_limits(df, freq, method='ffill', bool_only=False):
     for col_name, col in df.items():
         if not bool_only or pd.api.types.is_bool_dtype(col):
@@ -43,24 +50,87 @@ def __fillna_with_limits(df, freq, method='ffill', bool_only=False):
             elif pd.api.types.is_numeric_dtype(col):
                 col.fillna(value=0, inplace=True)
 
-def resolve_duplicated_index(group):
-    first = group.iloc[0]
-    for idx in range(1, len(group)):
-        row = group.iloc[idx]
-        for col in group.columns:
-            if pd.isnull(first[col]):
-                first[col] = row[col]
-    return first
-
 def merge_duplicated_NaN(df):
-    duplicates = df[df.index.duplicated(keep=False)]
-    resolved = duplicates.groupby(duplicates.index).apply(resolve_duplicated_index)
-    df = df.drop(duplicates.index)
-    df = pd.concat([df, resolved])
+    # Rows with the same index are merged into one row holding the first non-null value of every column.
+    duplicated = df.index.duplicated(keep=False)
+    duplicates = df[duplicated]
+    resolved = duplicates.groupby(level=list(range(df.index.nlevels)), sort=False).first()
+    df = pd.concat([df[~duplicated], resolved])
+    if isinstance(df.index, pd.MultiIndex):
+        # The former merge grouped by the index tuples, which dropped the level names.
+        df.index.names = [None] * df.index.nlevels
     df.sort_index(inplace=True)
     return df
 
-def process_canlogger_files(subject:int, data_folder: str, freq: int):
+def pivot_to_grid(timestamps: pd.DatetimeIndex, signals: pd.Series, values: dict[str, pd.Series],
+                  freq: int) -> pd.DataFrame:
+    """Wide frame with one column per signal and value column on the grid of the frequency.
+
+    Every message is assigned to its bin of the grid (anchored at midnight like resample) and every column holds
+    the first non-null value per bin, so the result is the same as unstacking the messages and resampling them
+    with first(). Only the non-null messages are pivoted, into dense float32 columns for numeric values and
+    object columns for strings.
+    """
+    period = pd.tseries.frequencies.to_offset(f'{1000.0 / freq}ms')
+    signals = signals.to_numpy()
+    times = timestamps.asi8
+
+    valid = {name: value.notna().to_numpy() & pd.notna(signals) for name, value in values.items()}
+    any_valid = np.logical_or.reduce(list(valid.values()))
+    if not any_valid.any():
+        return None
+
+    # Bins of all messages, relative to the first bin holding a message.
+    first_valid = timestamps[np.argmax(any_valid)]
+    origin = first_valid.normalize().value
+    bins = (times - origin) // period.nanos
+    first_bin = bins[any_valid].min()
+    num_bins = bins[any_valid].max() - first_bin + 1
+    bins -= first_bin
+
+    columns = {}
+    names = []
+    for name, value in values.items():
+        numeric = pd.api.types.is_numeric_dtype(value.dtype)
+        messages = pd.DataFrame({'bin': bins[valid[name]], 'signal': signals[valid[name]],
+                                 'value': value.to_numpy()[valid[name]]})
+        # Messages are in time order, so the first message per bin and signal holds the first value.
+        messages = messages.drop_duplicates(['bin', 'signal'], keep='first')
+        for signal, messages_signal in messages.groupby('signal', sort=True):
+            if numeric:
+                column = np.full(num_bins, np.nan, dtype=np.float32)
+            else:
+                column = np.full(num_bins, None, dtype=object)
+            column[messages_signal['bin'].to_numpy()] = messages_signal['value'].to_numpy()
+            columns[len(names)] = column
+            names.append(signal)
+
+    index = pd.date_range(start=pd.Timestamp(origin + first_bin * period.nanos, tz=timestamps.tz),
+                          periods=num_bins, freq=period)
+    df = pd.DataFrame(columns, index=index, copy=False)
+    df.columns = pd.Index(names)
+    return df
+
+def read_canlogger_file(f: str, freq: int, valid_years=VALID_YEARS, valid_range=None) -> pd.DataFrame:
+    if os.path.getsize(f) == 0:
+        print(f"Empty file {f}")
+        return None
+    df = pd.read_parquet(f, columns=CAN_COLUMNS)
+    if len(df) <= 0:
+        return None
+    df['timestampMs'] = pd.to_datetime(df['timestampMs'], unit='ms', utc=True)
+    fix_the_timestamp(df, 'timestampMs', valid_years, valid_range)
+    df.set_index('timestampMs', inplace=True)
+    df.sort_index(inplace=True)
+    df.index = df.index.tz_convert('Europe/Zurich')
+
+    # The messages are bucketed into the grid before pivoting, so the sparse frame of all timestamps and signals
+    # is never built.
+    return pivot_to_grid(df.index, df['url'] + '-' + df['name'],
+                         {'valueDouble': df['valueDouble'], 'valueString': df['valueString']}, freq)
+
+def process_canlogger_files(subject:int, data_folder: str, freq: int, read_threads: int = READ_THREADS,
+                            valid_years=VALID_YEARS, valid_range=None):
     data_path = os.path.join(data_folder, 'study_day/canlogger/*_can.parquet')
     print("Data path", data_path)
     files = sorted(glob.glob(os.path.join(data_folder, 'study_day/canlogger/*_can.parquet')))
@@ -70,31 +140,11 @@ def process_canlogger_files(subject:int, data_folder: str, freq: int):
 
     print(f"{subject} read...", end='')
 
-    def read_parquet(f):
-        if os.path.getsize(f) == 0:
-            print(f"Empty file {f}")
-            return None
-        df = pd.read_parquet(f)
-        if len(df) <= 0:
-            return None
-        df['timestampMs'] = pd.to_datetime(df['timestampMs'], unit='ms', utc=True)
-        fix_the_timestamp(df, 'timestampMs')
-        df.set_index('timestampMs', inplace=True)
-        df.sort_index(inplace=True)
-        df.index = df.index.tz_convert('Europe/Zurich')
-        df.index.name = 'timestamp'
-        df['url-name'] = df['url'] + '-' + df['name']
-        df.set_index([df.index, 'url-name'], inplace=True)
-        df = merge_duplicated_NaN(df)
-        df = df[['valueDouble', 'valueString']].unstack()
-        df.dropna(axis='columns', how='all', inplace=True)
-        df.columns = df.columns.get_level_values(1)
-        df.dropna(how='all', inplace=True)
-
-        df = df.resample(f'{1000.0 / freq}ms').first()
-        return df
-
-    df = pd.concat([read_parquet(f) for f in files if read_parquet(f) is not None])
+    # Every file is read once, the files are decoded concurrently (Arrow releases the GIL while decoding).
+    with ThreadPoolExecutor(max_workers=max(1, min(read_threads, len(files)))) as executor:
+        dfs = list(executor.map(lambda f: read_canlogger_file(f, freq, valid_years, valid_range), files))
+    df = pd.concat([df for df in dfs if df is not None])
+    del dfs
 
     df.sort_index(inplace=True)
     df = merge_duplicated_NaN(df)
@@ -149,7 +199,8 @@ def run_failsafe(fun, *args):
         print(traceback.format_exc())
 
 
-def process_subject(subject, data_folder, data_output_directory, freq, is_ref=False, reusing=False, ref_phase_to=1):
+def process_subject(subject, data_folder, data_output_directory, freq, is_ref=False, reusing=False, ref_phase_to=1,
+                    valid_years=VALID_YEARS, valid_range=None):
     print("Processing subject", subject, data_output_directory)
 
     try:
@@ -159,7 +210,8 @@ def process_subject(subject, data_folder, data_output_directory, freq, is_ref=Fa
             df = pd.read_parquet(data_output_directory + f"/canlogger/can-all_freq-{freq:03d}.parquet")
             reused = True
         else:
-            df = run_failsafe(process_canlogger_files, subject, data_folder, freq)
+            df = run_failsafe(process_canlogger_files, subject, data_folder, freq, READ_THREADS,
+                              valid_years, valid_range)
             reused = False
 
         if df is not None:
@@ -22,8 +22,14 @@
 #####################################################################
 
 import glob
+import numpy as np
 import pandas as pd
 
+from .interval_labels import label_intervals
+
+# Years in which the timestamps of the CAN logger are valid.
+VALID_YEARS = [2023]
+
 def merge_with_scenario(df: pd.DataFrame, data_folder: str, is_ref=False, ref_phase_to=1) -> pd.DataFrame:
     scenario_file = glob.glob(data_folder + "/study_day/handwritten-notes/driving_exact.csv")
     if len(scenario_file) == 0:
@@ -34,39 +40,50 @@ def merge_with_scenario(df: pd.DataFrame, data_folder: str, is_ref=False, ref_ph
                                    'validity', 'notes'])
     scenarios.dropna(subset=['date', 'start_time', 'end_time'], inplace=True)
 
-    df['notes'] = ''
+    scenarios['start'] = pd.to_datetime(scenarios['date'] + ' ' + scenarios['start_time'],
+                                        format='%d.%m.%Y %H:%M:%S.%f').dt.tz_localize('Europe/Zurich')
+    scenarios['end'] = pd.to_datetime(scenarios['date'] + ' ' + scenarios['end_time'],
+                                      format='%d.%m.%Y %H:%M:%S.%f').dt.tz_localize('Europe/Zurich')
+    if is_ref:
+        # For reference data, the phase is all 1 ("sober").
+        scenarios['phase'] = ref_phase_to
 
-    for idx, row in scenarios.iterrows():
-        start_time = pd.to_datetime(row['date'] + ' ' + row['start_time'], format='%d.%m.%Y %H:%M:%S.%f').tz_localize(
-            'Europe/Zurich')
-        end_time = pd.to_datetime(row['date'] + ' ' + row['end_time'], format='%d.%m.%Y %H:%M:%S.%f').tz_localize(
-            'Europe/Zurich')
-        in_scenario = (df.index >= start_time) & (df.index <= end_time)
-        df.loc[in_scenario, 'phase'] = row['phase']
-        if is_ref:
-            # For reference data, the phase is all 1 ("sober").
-            df.loc[in_scenario, 'phase'] = ref_phase_to
-        df.loc[in_scenario, 'scenario'] = row['scenario']
-        df.loc[in_scenario, 'scenario_number'] = row['scenario_number']
-        df.loc[in_scenario, 'validity'] = row['validity']
-        df.loc[in_scenario, 'notes'] = row['notes']
+    df['notes'] = ''
+    label_intervals(df, scenarios, {'phase': 'phase', 'scenario': 'scenario', 'scenario_number': 'scenario_number',
+                                    'validity': 'validity', 'notes': 'notes'})
 
     df.dropna(subset=['scenario'], inplace=True)
     return df
 
 
-def fix_the_timestamp(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
-    # Time synchronization of the logging device was somtimes corrupted.
+def is_valid_timestamp(timestamps: pd.Series, valid_years=VALID_YEARS, valid_range=None) -> np.ndarray:
+    # Timestamps are valid within valid_range (start inclusive, end exclusive) if given, else in the valid years.
+    if valid_range is not None:
+        start, end = (pd.Timestamp(time) for time in valid_range)
+        if timestamps.dt.tz is not None:
+            start = start.tz_localize('UTC') if start.tz is None else start
+            end = end.tz_localize('UTC') if end.tz is None else end
+        return ((timestamps >= start) & (timestamps < end)).to_numpy()
+    return timestamps.dt.year.isin(list(valid_years)).to_numpy()
+
+
+def fix_the_timestamp(df: pd.DataFrame, column_name: str, valid_years=VALID_YEARS, valid_range=None) -> pd.DataFrame:
+    # Time synchronization of the logging device was somtimes corrupted. Every run of invalid timestamps is shifted
+    # by the gap between its last timestamp and the following valid one. A run at the end of the data is shifted
+    # by the gap between its last two timestamps, its last timestamp is kept.
     timestamps = df[column_name].copy()
-    idx = len(df) - 2
-    while idx >= 0:
-        if timestamps[idx].year != 2023:
-            gap = timestamps[idx + 1] - timestamps[idx]
-            incorrect = idx
-            while incorrect >= 0 and timestamps[incorrect].year != 2023:
-                timestamps[incorrect] += gap
-                incorrect -= 1
-            idx = incorrect
-        idx -= 1
+    invalid = ~is_valid_timestamp(timestamps, valid_years, valid_range)
+    invalid[-1:] = False
+    if not invalid.any():
+        return df
+
+    values = timestamps.array
+    run_starts = np.flatnonzero(invalid & ~np.concatenate(([False], invalid[:-1])))
+    run_ends = np.flatnonzero(invalid & ~np.concatenate((invalid[1:], [False])))
+    gaps = values[run_ends + 1] - values[run_ends]
+
+    rows = np.flatnonzero(invalid)
+    runs = np.searchsorted(run_starts, rows, side='right') - 1
+    timestamps.iloc[rows] = values[rows] + gaps[runs]
     df[column_name] = timestamps
     return df
@@ -33,7 +33,9 @@ class ProcessingConfig:
             reference_placebo_subjects: list,
             set_reference_phase: bool,
             reference_phase_set_to: int,
-            reusing_old_df: bool = False
+            reusing_old_df: bool = False,
+            valid_timestamp_years: list = None,
+            valid_timestamp_range: list = None
     ) -> None:
         self.data_directory = data_directory
         self.data_output_directory = data_output_directory
@@ -44,6 +46,8 @@ class ProcessingConfig:
         self.set_reference_phase = set_reference_phase
         self.reference_phase_set_to = reference_phase_set_to
         self.reusing_old_df = reusing_old_df
+        self.valid_timestamp_years = valid_timestamp_years if valid_timestamp_years is not None else [2023]
+        self.valid_timestamp_range = valid_timestamp_range
 
 def load_config(filename: str) -> ProcessingConfig:
     with open(filename, 'r') as file:
@@ -58,6 +62,8 @@ def load_config(filename: str) -> ProcessingConfig:
         reference_placebo_subjects=config['reference_placebo_subjects'],
         set_reference_phase=config['set_reference_phase'],
         reference_phase_set_to=config['reference_phase_set_to'],
-        reusing_old_df=config['reusing_old_df']
+        reusing_old_df=config['reusing_old_df'],
+        valid_timestamp_years=config.get('valid_timestamp_years'),
+        valid_timestamp_range=config.get('valid_timestamp_range')
     )
 
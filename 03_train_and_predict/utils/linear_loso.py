@@ -0,0 +1,127 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+# Linear pipelines (see utils/pipelines.py) are a StandardScaler followed by a logistic regression.
+def is_linear_pipeline(clf: Pipeline) -> bool:
+    return (isinstance(clf, Pipeline) and len(clf.steps) == 2
+            and isinstance(clf.steps[0][1], StandardScaler)
+            and isinstance(clf.steps[1][1], LogisticRegression))
+
+
+def get_group_statistics(X: np.ndarray, group_index: np.ndarray,
+                         n_groups: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Number of samples, mean and sum of squared deviations from the mean of every feature per group.
+
+    The rows of one group at a time are accumulated in float64, so X (e.g. a float32 memory map) is never copied
+    as a whole.
+    """
+    counts = np.bincount(group_index, minlength=n_groups)
+    order = np.argsort(group_index, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    means = np.empty((n_groups, X.shape[1]))
+    m2 = np.empty((n_groups, X.shape[1]))
+    for group in range(n_groups):
+        values = X[order[bounds[group]:bounds[group + 1]]]
+        means[group] = values.sum(axis=0, dtype=np.float64) / counts[group]
+        m2[group] = ((values - means[group]) ** 2).sum(axis=0)
+    return counts, means, m2
+
+
+def get_fold_scaling(counts: np.ndarray, means: np.ndarray, m2: np.ndarray,
+                     group: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and scale of a StandardScaler fitted on all groups except the held-out group.
+
+    The statistics of the remaining groups are combined with the parallel variance formula, so the training
+    matrix of the fold never has to be scaled from scratch.
+    """
+    keep = np.arange(len(counts)) != group
+    n = counts[keep].sum()
+    mean = (counts[keep, None] * means[keep]).sum(axis=0) / n
+    var = (m2[keep].sum(axis=0) + (counts[keep, None] * (means[keep] - mean) ** 2).sum(axis=0)) / n
+    # Constant features (up to rounding) are not scaled, like in StandardScaler.
+    eps = np.finfo(np.float64).eps
+    constant = var <= n * eps * var + (n * mean * eps) ** 2
+    scale = np.sqrt(var)
+    scale[constant | (scale == 0)] = 1.0
+    return mean, scale
+
+
+def train_linear_chain(clf: Pipeline, X: np.ndarray, y: np.ndarray, group_index: np.ndarray,
+                       statistics: tuple[np.ndarray, np.ndarray, np.ndarray], chain: list[int],
+                       features: list[str], warm_start: bool) -> dict[int, dict[str, any]]:
+    """Train the held-out participants of a chain one after the other.
+
+    With warm_start, the solver of every fold starts from the coefficients of the previous fold, which only
+    differ by the contribution of two participants.
+    """
+    model = clone(clf.steps[1][1])
+    model.set_params(warm_start=warm_start)
+
+    results = {}
+    for group in chain:
+        mean, scale = get_fold_scaling(*statistics, group)
+        test_index = group_index == group
+        X_train = (X[~test_index] - mean) / scale
+        X_test = (X[test_index] - mean) / scale
+        y_train = y[~test_index]
+
+        model.fit(X_train, y_train)
+        y_pred_proba_train = model.predict_proba(X_train)[:, 1]
+
+        coef = pd.DataFrame({"Feature": features + ["intercept"],
+                             "Coefficients": [*model.coef_[0], *model.intercept_]})
+        results[group] = {"y_pred_proba_test": model.predict_proba(X_test)[:, 1],
+                          "AUCROC_train_score": roc_auc_score(y_train, y_pred_proba_train),
+                          "coef": coef}
+    return results
+
+
+def train_linear_LOSO(clf: Pipeline, X: np.ndarray, y: np.ndarray, group_index: np.ndarray, features: list[str],
+                      n_jobs: int, verbose: int, parallel: bool, warm_start: bool) -> dict[int, dict[str, any]]:
+    """Leave-one-subject-out training of a linear pipeline, keyed by the index of the held-out participant.
+
+    The per-participant feature statistics are computed once, every fold derives its scaler from them. The
+    participants are split into one chain of consecutive folds per job. X, y and group_index are best passed as
+    memory maps, which joblib hands to the workers by reference.
+    """
+    n_groups = int(group_index.max()) + 1
+    statistics = get_group_statistics(X, group_index, n_groups)
+
+    # Negative n_jobs count back from all cores like in joblib.
+    n_chains = max(1, min(effective_n_jobs(n_jobs), n_groups)) if parallel else 1
+    chains = [chain.tolist() for chain in np.array_split(np.arange(n_groups), n_chains)]
+
+    with Parallel(n_jobs=n_chains, verbose=verbose) as runner:
+        results = runner(delayed(train_linear_chain)(
+            clf, X, y, group_index, statistics, chain, features, warm_start) for chain in chains)
+
+    return {group: result for chain_results in results for group, result in chain_results.items()}
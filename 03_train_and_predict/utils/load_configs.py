@@ -36,6 +36,7 @@ def load_configs(config_file: str) -> dict[str, any]:
     config["can_features"] = cfg_prediction['can_features']
     config["window_length"] = cfg_prediction['window_length']
     config["num_cores"] = cfg_prediction['num_cores']
+    config["warm_start"] = cfg_prediction['warm_start']
     config["use_dmc"] = cfg_prediction['use_dmc']
     config["use_can"] = cfg_prediction['use_can']
     config["use_placebo"] = cfg_prediction['use_placebo']
@@ -22,12 +22,41 @@
 #####################################################################
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import os
 
 
+num_samples_ET_threshold = 0.75
+num_samples_CAN_threshold = 0.75
+
+
+# Filter on the participant column of a parquet file, the ids are converted to integers if the column is numeric.
+def get_participant_filter(path: str, column: str, participants: list[str]) -> tuple[str, str, list]:
+    if pa.types.is_integer(ds.dataset(path).schema.field(column).type):
+        participants = [int(participant) for participant in participants if participant.isdigit()]
+    return column, 'in', participants
+
+
+def sort_by_index(data: pd.DataFrame) -> pd.DataFrame:
+    if data.index.is_monotonic_increasing:
+        return data
+    return data.sort_index(kind='stable')
+
+
 def load_data(config: dict[str, any]) -> tuple[pd.DataFrame, list[str]]:
     core_features = []
 
+    # Only the selected participants are loaded, without the reference and placebo participants if they are not used.
+    participants_to_keep = (config["selected_participants"]["treatment"] +
+                            config["selected_participants"]["reference"] +
+                            config["selected_participants"]["placebo"])
+    participants_to_load = [
+        participant for participant in participants_to_keep
+        if (config["use_reference"] or participant not in config["selected_participants"]["reference"])
+        and (config["use_placebo"] or participant not in config["selected_participants"]["placebo"])
+    ]
+
     if config["use_dmc"]:
         core_features = core_features + config["dmc_features"]
 
@@ -40,22 +69,14 @@ def load_data(config: dict[str, any]) -> tuple[pd.DataFrame, list[str]]:
         data_path = os.path.join(
             config["data_directory"], 'ircam/all_probands_'
                                       + str(config["window_length"]) + '.parquet')
-        data_et = pd.read_parquet(data_path, columns=columns_to_load)
-
-        if not config["use_reference"]:
-            reference_index = data_et["groundtruth+id++"].isin(
-                config["selected_participants"]["reference"])
-            data_et = data_et[~reference_index]
-        if not config["use_placebo"]:
-            placebo_index = data_et["groundtruth+id++"].isin(
-                config["selected_participants"]["placebo"])
-            data_et = data_et[~placebo_index]
+        # Participants and the sample proportion are filtered while scanning the file.
+        data_et = pd.read_parquet(data_path, columns=columns_to_load, filters=[
+            get_participant_filter(data_path, 'groundtruth+id++', participants_to_load),
+            ('agg+proportion_num_samples++', '>=', num_samples_ET_threshold),
+        ])
 
         data_et = data_et.dropna()
 
-        num_samples_ET_threshold = 0.75
-        data_et = data_et[data_et['agg+proportion_num_samples++'] >= num_samples_ET_threshold]
-
         if config["verbose"]:
             print("Shape ET data", str(data_et.shape))
 
@@ -68,26 +89,18 @@ def load_data(config: dict[str, any]) -> tuple[pd.DataFrame, list[str]]:
         if 'agg+proportion_num_samples+CAN+' not in columns_to_load:
             columns_to_load.append('agg+proportion_num_samples+CAN+')
 
-        can_data = pd.read_parquet(os.path.join(
+        can_path = os.path.join(
             config["data_directory"], 'canlogger/aggregated_'
                                       + str(config["window_length"]).zfill(3)
-                                      +'_freq-050.parquet'),
-            columns=columns_to_load)
+                                      +'_freq-050.parquet')
+        can_data = pd.read_parquet(can_path, columns=columns_to_load, filters=[
+            get_participant_filter(can_path, 'groundtruth+id+CAN+',
+                                   [s[6:] for s in participants_to_load]),
+            ('agg+proportion_num_samples+CAN+', '>=', num_samples_CAN_threshold),
+        ])
 
         can_data["groundtruth+id+CAN+"] = can_data["groundtruth+id+CAN+"].astype(str)
 
-        if not config["use_reference"]:
-            reference_index = can_data["groundtruth+id+CAN+"].isin(
-                [s[6:] for s in config["selected_participants"]["reference"]])
-            can_data = can_data[~reference_index]
-        if not config["use_placebo"]:
-            placebo_index = can_data["groundtruth+id+CAN+"].isin(
-                [s[6:] for s in config["selected_participants"]["placebo"]])
-            can_data = can_data[~placebo_index]
-
-        num_samples_CAN_threshold = 0.75
-        can_data = can_data[can_data['agg+proportion_num_samples+CAN+'] >= num_samples_CAN_threshold]
-
         if config["verbose"]:
             print("Shape CAN data", str(can_data.shape))
 
@@ -97,8 +110,8 @@ def load_data(config: dict[str, any]) -> tuple[pd.DataFrame, list[str]]:
         'groundtruth+scenario+CAN+', 'groundtruth+variant+CAN+', 'groundtruth+id+CAN+']]
 
     if config["use_can"] and config["use_dmc"]:
-        merged_df = pd.merge(
-            data_et, can_data, left_index=True, right_index=True, how='inner')
+        # Join on the time index, sorted indexes are joined in a single pass.
+        merged_df = sort_by_index(data_et).join(sort_by_index(can_data), how='inner')
 
         if config["verbose"]:
             print(merged_df.shape)
@@ -127,9 +140,6 @@ def load_data(config: dict[str, any]) -> tuple[pd.DataFrame, list[str]]:
         data["groundtruth+id++"] = "drive_" + data["groundtruth+id++"]
 
     # Delete participants that were not selected.
-    participants_to_keep = (config["selected_participants"]["treatment"] +
-                            config["selected_participants"]["reference"] +
-                            config["selected_participants"]["placebo"])
     data = data.loc[data["groundtruth+id++"].isin(participants_to_keep)].copy()
 
     if config["verbose"]:
@@ -21,29 +21,38 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import os
+import tempfile
 from sklearn.metrics import roc_auc_score
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, dump, load
 import numpy as np
 from sklearn.base import clone
 import pandas as pd
 from sklearn.pipeline import Pipeline
 from utils.scale_train_one_model import train_sklearn_LR_lasso
+from utils.linear_loso import is_linear_pipeline, train_linear_LOSO
 
-def train_one_participant(clf: Pipeline, X: pd.DataFrame, y: pd.Series,
-                          y_orig: pd.Series, groups: pd.Series, scenarios: pd.Series,
-                          group: str, config: dict[str, any]) -> dict[str, any]:
-    X_train = X[groups != group]
-    y_train = y[groups != group]
-    X_test = X[groups == group]
+# Copy an array once into a file in folder and open it as read-only memory map, which joblib passes to its
+# workers by reference instead of pickling the data for every job.
+def to_shared_array(values: np.ndarray, folder: str, name: str) -> np.memmap:
+    filename = os.path.join(folder, name + ".mmap")
+    dump(np.ascontiguousarray(values), filename)
+    return load(filename, mmap_mode="r")
 
-    y_pred_proba_train, y_pred_proba_test, coef = train_sklearn_LR_lasso(X_train, y_train, X_test)
+
+def train_one_participant(clf: Pipeline, X: np.ndarray, y: np.ndarray, group_index: np.ndarray,
+                          group: int, features: list[str], config: dict[str, any]) -> dict[int, any]:
+    test_index = group_index == group
+    X_train = X[~test_index]
+    y_train = y[~test_index]
+    X_test = X[test_index]
+
+    y_pred_proba_train, y_pred_proba_test, coef = train_sklearn_LR_lasso(X_train, y_train, X_test, features)
 
     AUCROC_train_score = roc_auc_score(y_train, y_pred_proba_train)
 
     return {group: {"y_pred_proba_test": y_pred_proba_test, "AUCROC_train_score": AUCROC_train_score,
-                    "coef": coef, "X_test": X_test, "y_true_test": y[groups == group],
-                    "user_ids": groups[groups == group], "scenarios": scenarios[groups == group],
-                    "y_orig_test": y_orig[groups == group]}}
+                    "coef": coef}}
 
 
 def train_LOSO(data: pd.DataFrame, clf: Pipeline, y_column: str,
@@ -52,29 +61,39 @@ def train_LOSO(data: pd.DataFrame, clf: Pipeline, y_column: str,
 
     n_jobs = config["num_cores"]
 
-    X = data[core_features]
     y_orig = data["groundtruth+state++"]
     scenarios = data["groundtruth+scenario++"]
     groups = data["groundtruth+id++"]
     y = data[y_column]
+    names, group_index = np.unique(groups.to_numpy(), return_inverse=True)
 
     verbose = 0
     if config["verbose"]:
         verbose = 101
 
-    if config["use_parallel_processing"]:
-        with Parallel(n_jobs=n_jobs, verbose=verbose) as parallel:
-            results = parallel(delayed(train_one_participant)(clone(
-                clf), X, y, y_orig, groups, scenarios, group, config) \
-                               for group in np.unique(groups))
-    else:
-        results = []
-        for group in np.unique(groups):
-            print("Processing: " + str(group))
-            results.append(train_one_participant(
-                clone(clf), X, y, y_orig, groups, scenarios, group, config))
-
-    results = {k: v for d in results for k, v in d.items()}
+    # The features and labels are converted once, the workers only get the index of their held-out participant.
+    with tempfile.TemporaryDirectory() as folder:
+        X_shared = to_shared_array(data[core_features].to_numpy(dtype=np.float32), folder, "X")
+        y_shared = to_shared_array(y.to_numpy(dtype=np.int8), folder, "y")
+        group_index = to_shared_array(group_index.astype(np.int32), folder, "groups")
+
+        if is_linear_pipeline(clf):
+            results = [train_linear_LOSO(clf, X_shared, y_shared, group_index, core_features, n_jobs, verbose,
+                                         config["use_parallel_processing"], config["warm_start"])]
+        elif config["use_parallel_processing"]:
+            with Parallel(n_jobs=n_jobs, verbose=verbose) as parallel:
+                results = parallel(delayed(train_one_participant)(clone(
+                    clf), X_shared, y_shared, group_index, group, core_features, config) \
+                                   for group in range(len(names)))
+        else:
+            results = []
+            for group in range(len(names)):
+                print("Processing: " + str(names[group]))
+                results.append(train_one_participant(
+                    clone(clf), X_shared, y_shared, group_index, group, core_features, config))
+
+        results = {names[k]: v for d in results for k, v in d.items()}
+        del X_shared, y_shared, group_index
 
     data_out = data.copy()
     data_out["y_test"] = -1
@@ -88,15 +107,15 @@ def train_LOSO(data: pd.DataFrame, clf: Pipeline, y_column: str,
     for group in sorted(results.keys()):
         participant_index = (data_out["groundtruth+id++"] == group)
         data_out.loc[participant_index,
-                     'y_test'] = results[group]["y_true_test"]
+                     'y_test'] = y[participant_index]
         data_out.loc[participant_index,
                      'y_proba_test'] = results[group]["y_pred_proba_test"]
         data_out.loc[participant_index,
-                     'y_orig_test'] = results[group]["y_orig_test"]
+                     'y_orig_test'] = y_orig[participant_index]
         data_out.loc[participant_index,
-                     'user_ids'] = results[group]["user_ids"]
+                     'user_ids'] = groups[participant_index]
         data_out.loc[participant_index,
-                     'scenarios'] = results[group]["scenarios"]
+                     'scenarios'] = scenarios[participant_index]
 
         results_participant = dict()
         results_participant["coefs"] = results[group]["coef"]
@@ -26,13 +26,16 @@ from utils.pipelines import pipe_lasso, pipe_RandomForest
 from sklearn.base import clone
 
 
-def train_sklearn_LR_lasso(X_train, y_train, X_test):
+def train_sklearn_LR_lasso(X_train, y_train, X_test, features=None):
+    if features is None:
+        features = X_train.columns.tolist()
+
     clf = clone(pipe_lasso)
     clf_fitted = clf.fit(X_train, y_train)
     y_pred_proba_train = clf_fitted.predict_proba(X_train)[:, 1]
     y_pred_proba_test = clf_fitted.predict_proba(X_test)[:, 1]
 
-    coef = pd.DataFrame({"Feature": X_train.columns.tolist() + ["intercept"],
+    coef = pd.DataFrame({"Feature": features + ["intercept"],
                          "Coefficients": [*clf_fitted["clf"].coef_[0],
                                           *clf_fitted["clf"].intercept_]})
 